@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import posixpath
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import buildstats
+
+# Files fetched by well-known names (favicon.ico, robots.txt, ...) keep them.
+fingerprint_extensions = (
+    ".avif",
+    ".css",
+    ".gif",
+    ".jpeg",
+    ".jpg",
+    ".js",
+    ".png",
+    ".svg",
+    ".webp",
+    ".woff",
+    ".woff2",
+)
+
+# url(...) targets, and the quoted form of @import.
+css_reference_pattern = re.compile(
+    r"""url\(\s*(?:"([^"]*)"|'([^']*)'|([^'")\s]+))\s*\)|@import\s+(?:"([^"]*)"|'([^']*)')"""
+)
+external_url_pattern = re.compile(r"^(?:[a-zA-Z][a-zA-Z0-9+.-]*:|//|#)")
+
+active = None
+
+
+class AssetMap:
+    def __init__(self, dir_path_cache=None):
+        self.dir_path_cache = dir_path_cache
+        self.urls = {}
+        self.sources = {}
+        self.names = {}
+        self.digest = ""
+        # Stylesheets are copied from a cached copy with their references
+        # fingerprinted; dependencies lists the files each one references.
+        self.rewritten = {}
+        self.dependencies = {}
+
+    def add(self, from_path, site_path, file_hash):
+        stem, extension = posixpath.splitext(site_path)
+        fingerprinted = f"{stem}.{file_hash[:10]}{extension}"
+        self.urls[site_path] = fingerprinted
+        self.sources[site_path] = from_path
+        self.names[from_path] = posixpath.basename(fingerprinted)
+
+    def add_stylesheets(self, stylesheets):
+        # A stylesheet's fingerprint covers those of the assets it references,
+        # so it is renamed when they change. Stylesheets that import others
+        # are added after them.
+        pending = {site_path: (from_path, digest) for from_path, site_path, digest in stylesheets}
+
+        def add(site_path):
+            from_path, digest = pending.pop(site_path)
+            with open(from_path, "r", encoding="utf-8") as css_file:
+                text = css_file.read()
+            targets = [css_site_path(url, site_path) for url in css_references(text)]
+            dependencies = []
+            for target in targets:
+                if target in pending:
+                    add(target)
+                source = self.sources.get(target)
+                if source is None or source in dependencies:
+                    continue
+                dependencies.append(source)
+                for path in self.dependencies.get(source, []):
+                    if path not in dependencies:
+                        dependencies.append(path)
+            fingerprints = [self.urls.get(target, "") for target in targets]
+            digest = hashlib.sha256("\0".join([digest] + fingerprints).encode("utf-8")).hexdigest()
+            self.add(from_path, site_path, digest)
+            self.dependencies[from_path] = dependencies
+
+            cache_path = os.path.join(self.dir_path_cache, f"{digest}.css")
+            if not os.path.exists(cache_path):
+                os.makedirs(self.dir_path_cache, exist_ok=True)
+                tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as css_file:
+                    css_file.write(rewrite_css(text, site_path, self))
+                os.replace(tmp_path, cache_path)
+            self.rewritten[from_path] = cache_path
+
+        while pending:
+            add(next(iter(pending)))
+
+    def finish(self):
+        # Identifies this set of fingerprints, for caches of rendered URLs.
+        data = json.dumps(self.urls, sort_keys=True)
+        self.digest = hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+    def url(self, url):
+        # Maps a site-absolute URL to its fingerprinted form, keeping any
+        # query string or fragment; unknown URLs are returned unchanged.
+        split = len(url)
+        for separator in ("?", "#"):
+            index = url.find(separator)
+            if index != -1:
+                split = min(split, index)
+        fingerprinted = self.urls.get(url[:split])
+        if fingerprinted is None:
+            return url
+        return fingerprinted + url[split:]
+
+    def save(self, path):
+        # Rewritten only when it changes, so unchanged builds leave it alone.
+        text = json.dumps(self.urls, indent=1, sort_keys=True) + "\n"
+        if os.path.exists(path):
+            with open(path, "r") as manifest_file:
+                if manifest_file.read() == text:
+                    return
+        with open(path, "w") as manifest_file:
+            manifest_file.write(text)
+
+
+def css_references(text):
+    for match in css_reference_pattern.finditer(text):
+        url = next(group for group in match.groups() if group is not None)
+        if url and not external_url_pattern.match(url):
+            yield url
+
+
+def css_site_path(url, css_site_path):
+    # The site path a stylesheet reference names, without query or fragment.
+    path = url.split("#", 1)[0].split("?", 1)[0]
+    if not path.startswith("/"):
+        path = posixpath.join(posixpath.dirname(css_site_path), path)
+    return posixpath.normpath(path)
+
+
+def rewrite_css(text, site_path, asset_map):
+    # Only the file name changes, so relative references stay relative.
+    def rewrite(match):
+        reference = match.group()
+        for url in match.groups():
+            if url is None or url == "" or external_url_pattern.match(url):
+                continue
+            fingerprinted = asset_map.urls.get(css_site_path(url, site_path))
+            if fingerprinted is None:
+                continue
+            path = url.split("#", 1)[0].split("?", 1)[0]
+            name = posixpath.basename(fingerprinted)
+            new_url = posixpath.join(posixpath.dirname(path), name) + url[len(path) :]
+            reference = reference.replace(url, new_url, 1)
+        return reference
+
+    return css_reference_pattern.sub(rewrite, text)
+
+
+def build_asset_map(dir_path_static, file_hash, workers=1, extra_files=(), dir_path_cache=None):
+    # extra_files are (path, site path) pairs for generated assets, such as
+    # image variants, that do not live under static/. With a cache
+    # directory, stylesheets get their references fingerprinted too.
+    stats = buildstats.active
+    with stats.phase("fingerprint"):
+        files = []
+        for dir_path, dir_names, filenames in os.walk(dir_path_static):
+            dir_names.sort()
+            for filename in sorted(filenames):
+                if filename.endswith(fingerprint_extensions):
+                    from_path = os.path.join(dir_path, filename)
+                    relative_path = os.path.relpath(from_path, dir_path_static)
+                    files.append((from_path, "/" + relative_path.replace(os.sep, "/")))
+        files.extend(extra_files)
+
+        paths = [from_path for from_path, _ in files]
+        if workers > 1 and len(paths) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                hashes = list(executor.map(file_hash, paths))
+        else:
+            hashes = [file_hash(path) for path in paths]
+
+        asset_map = AssetMap(dir_path_cache)
+        stylesheets = []
+        for (from_path, site_path), digest in zip(files, hashes):
+            if dir_path_cache is not None and site_path.endswith(".css"):
+                stylesheets.append((from_path, site_path, digest))
+            else:
+                asset_map.add(from_path, site_path, digest)
+        asset_map.add_stylesheets(stylesheets)
+        asset_map.finish()
+    stats.count("assets fingerprinted", len(files))
+    return asset_map
+
+
+def activate(asset_map):
+    global active
+    previous = active
+    active = asset_map
+    return previous
@@ -0,0 +1,214 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+
+from corpus import (
+    default_block_mix,
+    default_inline_mix,
+    generate_corpus,
+    inline,
+    synthetic_page,
+)
+from gencontent import generate_pages_recursive
+from inline_markdown import text_to_textnodes
+from markdown_blocks import markdown_to_blocks, markdown_to_html_node
+
+template_path = "./template.html"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the site generator.")
+    parser.add_argument("--pages", type=int, default=500, help="pages in the synthetic corpus")
+    parser.add_argument("--page-size", type=int, default=8192, help="approximate bytes per page")
+    parser.add_argument("--depth", type=int, default=2, help="maximum section nesting depth")
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes for the build")
+    parser.add_argument("--repeat", type=int, default=3, help="build runs; the fastest is compared with the baseline")
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=7,
+        help="timed samples per microbenchmark, each at least 0.2s long (default: 7)",
+    )
+    parser.add_argument(
+        "--block-mix",
+        type=mix_type(default_block_mix),
+        metavar="KIND=WEIGHT,...",
+        help="relative weights of the block kinds in the corpus, e.g. paragraph=4,code=1 "
+        f"(kinds: {', '.join(default_block_mix)})",
+    )
+    parser.add_argument(
+        "--inline-mix",
+        type=mix_type(default_inline_mix),
+        metavar="KIND=WEIGHT,...",
+        help="relative weights of the inline kinds in the corpus, e.g. text=4,link=2 "
+        f"(kinds: {', '.join(default_inline_mix)})",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against saved results")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="fail when a benchmark is this much slower than the baseline (default: 0.10)",
+    )
+    parser.add_argument(
+        "--noise",
+        type=float,
+        default=0.05,
+        help="noise floor added to --threshold for every benchmark (default: 0.05)",
+    )
+    return parser.parse_args()
+
+
+def mix_type(kinds):
+    # Parses "paragraph=4,code=1" into a mix of the given kinds.
+    def parse(text):
+        mix = {}
+        for item in text.split(","):
+            kind, equals, weight = item.partition("=")
+            kind = kind.strip()
+            if kind not in kinds:
+                raise argparse.ArgumentTypeError(f"unknown kind: {kind}")
+            try:
+                mix[kind] = float(weight) if equals else 1.0
+            except ValueError:
+                raise argparse.ArgumentTypeError(f"invalid weight: {weight}")
+            if mix[kind] < 0:
+                raise argparse.ArgumentTypeError(f"invalid weight: {weight}")
+        if not any(mix.values()):
+            raise argparse.ArgumentTypeError("at least one kind needs a positive weight")
+        return mix
+
+    return parse
+
+
+def bench_build(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        content_path = os.path.join(tmp, "content")
+        corpus_bytes = generate_corpus(
+            content_path,
+            args.pages,
+            depth=args.depth,
+            page_size=args.page_size,
+            block_mix=args.block_mix,
+            inline_mix=args.inline_mix,
+            seed=args.seed,
+        )
+        runs = []
+        for run in range(args.repeat):
+            docs_path = os.path.join(tmp, f"docs-{run}")
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(content_path, template_path, docs_path, "/", jobs=args.jobs)
+            runs.append(time.perf_counter() - start)
+        seconds = statistics.median(runs)
+    return {
+        "seconds": seconds,
+        "best": min(runs),
+        "pages_per_second": args.pages / seconds,
+        "mb_per_second": corpus_bytes / seconds / 2**20,
+    }
+
+
+def bench_function(func, arg, samples):
+    # autorange picks a loop count that runs for at least 0.2s, so short
+    # functions are not timed over a few milliseconds of scheduler noise.
+    timer = timeit.Timer(lambda: func(arg))
+    number, _ = timer.autorange()
+    runs = [seconds / number for seconds in timer.repeat(repeat=samples, number=number)]
+    return {"seconds": statistics.median(runs), "best": min(runs)}
+
+
+def bench_functions(args):
+    rng = random.Random(args.seed)
+    page = synthetic_page(rng, args.page_size, args.block_mix, args.inline_mix)
+    paragraph = " ".join(inline(rng, args.inline_mix) for _ in range(20))
+    node = markdown_to_html_node(page)
+    return {
+        "markdown_to_blocks": bench_function(markdown_to_blocks, page, args.samples),
+        "markdown_to_html_node": bench_function(markdown_to_html_node, page, args.samples),
+        "text_to_textnodes": bench_function(text_to_textnodes, paragraph, args.samples),
+        "to_html": bench_function(lambda node: node.to_html(), node, args.samples),
+    }
+
+
+def compare(results, baseline, threshold, noise):
+    # The fastest runs are compared, since noise only ever adds time, and
+    # the allowance is fixed so one outlier cannot widen it.
+    regressions = []
+    allowance = threshold + noise
+    for name, result in results["benchmarks"].items():
+        previous = baseline["benchmarks"].get(name)
+        if previous is None:
+            continue
+        change = result["best"] / previous.get("best", previous["seconds"]) - 1
+        marker = "REGRESSION" if change > allowance else "ok"
+        print(
+            f"  {name:<24}{previous.get('best', previous['seconds']) * 1e3:>10.3f}ms"
+            f"{result['best'] * 1e3:>10.3f}ms{change:>+9.1%}  {marker}"
+        )
+        if change > allowance:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    args = parse_args()
+    benchmarks = {"build": bench_build(args)}
+    benchmarks.update(bench_functions(args))
+    results = {
+        "python": platform.python_version(),
+        "config": {
+            "pages": args.pages,
+            "page_size": args.page_size,
+            "depth": args.depth,
+            "jobs": args.jobs,
+            "repeat": args.repeat,
+            "samples": args.samples,
+            "block_mix": args.block_mix,
+            "inline_mix": args.inline_mix,
+            "seed": args.seed,
+        },
+        "benchmarks": benchmarks,
+    }
+
+    build = benchmarks["build"]
+    print(
+        f"build: {args.pages} pages in {build['seconds']:.2f}s "
+        f"({build['pages_per_second']:.0f} pages/s, {build['mb_per_second']:.2f} MB/s)"
+    )
+    for name, result in benchmarks.items():
+        if name != "build":
+            print(f"  {name:<24}{result['seconds'] * 1e6:>12.1f}us")
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline["config"] != results["config"]:
+            print("warning: baseline was recorded with a different configuration")
+        print(
+            f"compared with {args.baseline} (fastest runs, threshold {args.threshold:.0%} "
+            f"+ noise {args.noise:.0%}):"
+        )
+        regressions = compare(results, baseline, args.threshold, args.noise)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
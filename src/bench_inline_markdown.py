@@ -0,0 +1,85 @@
+import timeit
+
+from inline_markdown import (
+    extract_markdown_images,
+    extract_markdown_links,
+    split_nodes_delimiter,
+    text_to_textnodes,
+)
+from textnode import TextNode, TextType
+
+
+def split_passes_text_to_textnodes(text):
+    # The original five-pass implementation, kept here as the baseline.
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_passes_split_nodes(nodes, extract_markdown_images, "![{}]({})", TextType.IMAGE)
+    nodes = split_passes_split_nodes(nodes, extract_markdown_links, "[{}]({})", TextType.LINK)
+    return nodes
+
+
+def split_passes_split_nodes(old_nodes, extract, markup, text_type):
+    new_nodes = []
+    for old_node in old_nodes:
+        if old_node.text_type != TextType.TEXT:
+            new_nodes.append(old_node)
+            continue
+        original_text = old_node.text
+        matches = extract(original_text)
+        if len(matches) == 0:
+            new_nodes.append(old_node)
+            continue
+        for text, url in matches:
+            sections = original_text.split(markup.format(text, url), 1)
+            if sections[0] != "":
+                new_nodes.append(TextNode(sections[0], TextType.TEXT))
+            new_nodes.append(TextNode(text, text_type, url))
+            original_text = sections[1]
+        if original_text != "":
+            new_nodes.append(TextNode(original_text, TextType.TEXT))
+    return new_nodes
+
+
+def link_dense_paragraph(count):
+    parts = []
+    for i in range(count):
+        parts.append(f"see [link {i}](/blog/post-{i}) and ![image {i}](/images/{i}.png)")
+    return " ".join(parts)
+
+
+def emphasis_dense_paragraph(count):
+    parts = []
+    for i in range(count):
+        parts.append(f"**bold {i}** then _italic {i}_ and `code {i}`")
+    return " ".join(parts)
+
+
+paragraphs = {
+    "link-dense x50": link_dense_paragraph(50),
+    "link-dense x500": link_dense_paragraph(500),
+    "link-dense x5000": link_dense_paragraph(5000),
+    "emphasis-dense x50": emphasis_dense_paragraph(50),
+    "emphasis-dense x500": emphasis_dense_paragraph(500),
+    "emphasis-dense x5000": emphasis_dense_paragraph(5000),
+}
+
+
+def bench(func, text, number):
+    return min(timeit.repeat(lambda: func(text), number=number, repeat=5)) / number
+
+
+def main():
+    print(f"{'paragraph':<22}{'split passes':>14}{'single pass':>14}{'speedup':>10}")
+    for name, text in paragraphs.items():
+        if split_passes_text_to_textnodes(text) != text_to_textnodes(text):
+            raise ValueError(f"implementations disagree on {name}")
+        number = 20000 // len(text.split(" ")) + 3
+        before = bench(split_passes_text_to_textnodes, text, number)
+        after = bench(text_to_textnodes, text, number)
+        print(f"{name:<22}{before * 1e6:>12.1f}us{after * 1e6:>12.1f}us{before / after:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
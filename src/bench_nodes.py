@@ -0,0 +1,41 @@
+import random
+import resource
+import sys
+import tracemalloc
+
+from buildstats import count_nodes
+from corpus import synthetic_page
+from markdown_blocks import markdown_to_html_node
+
+
+def main():
+    corpus_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    page_size = 1 << 20
+    rng = random.Random(0)
+    pages = [synthetic_page(rng, page_size) for _ in range(corpus_mb)]
+
+    node_counts = []
+    for page in pages:
+        node = markdown_to_html_node(page)
+        node_counts.append(count_nodes(node))
+        del node
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    tracemalloc.start()
+    peaks = []
+    for page in pages:
+        tracemalloc.reset_peak()
+        node = markdown_to_html_node(page)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        del node
+    tracemalloc.stop()
+
+    print(f"corpus: {len(pages)} pages, {sum(len(page) for page in pages) / 2**20:.1f} MB")
+    print(f"nodes per page: avg {sum(node_counts) // len(node_counts)}, max {max(node_counts)}")
+    print(f"peak traced memory per page: max {max(peaks) / 2**20:.1f} MB")
+    print(f"bytes per node: {max(peaks) / max(node_counts):.0f}")
+    print(f"peak RSS: {max_rss_kb / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
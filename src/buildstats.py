@@ -0,0 +1,164 @@
+import json
+import threading
+import time
+
+
+class BuildStats:
+    enabled = True
+
+    def __init__(self):
+        self.phases = {}
+        self.counters = {}
+        self.pages = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def phase(self, name):
+        return PhaseTimer(self, name)
+
+    def open_phases(self):
+        # Phases nest (inline parsing happens inside markdown, inside
+        # render), so each thread keeps a stack of the ones it is in.
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def add_phase(self, name, wall, cpu, calls=1):
+        with self.lock:
+            totals = self.phases.setdefault(name, [0.0, 0.0, 0])
+            totals[0] += wall
+            totals[1] += cpu
+            totals[2] += calls
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_page(self, path, seconds):
+        self.pages.append((str(path), seconds))
+
+    def merge(self, data):
+        for name, phase in data["phases"].items():
+            self.add_phase(name, phase["wall"], phase["cpu"], phase["calls"])
+        for name, amount in data["counters"].items():
+            self.count(name, amount)
+        for path, seconds in data["pages"]:
+            self.add_page(path, seconds)
+
+    def to_dict(self):
+        return {
+            "phases": {
+                name: {"wall": wall, "cpu": cpu, "calls": calls}
+                for name, (wall, cpu, calls) in self.phases.items()
+            },
+            "counters": self.counters,
+            "pages": self.pages,
+        }
+
+    def slowest_pages(self, count):
+        return sorted(self.pages, key=lambda page: page[1], reverse=True)[:count]
+
+    def report(self, slowest=10):
+        # Phase times exclude the phases nested in them, so they add up to
+        # no more than the total (less whatever ran on other threads).
+        lines = ["Build stats:", f"  {'phase (self time)':<20}{'wall':>10}{'cpu':>10}{'calls':>8}"]
+        for name, (wall, cpu, calls) in self.phases.items():
+            lines.append(f"  {name:<20}{wall:>9.3f}s{cpu:>9.3f}s{calls:>8}")
+        for name, amount in sorted(self.counters.items()):
+            value = format_bytes(amount) if name.startswith("bytes") else amount
+            lines.append(f"  {name}: {value}")
+        if self.pages:
+            lines.append("  slowest pages:")
+            for path, seconds in self.slowest_pages(slowest):
+                lines.append(f"    {seconds:.4f}s {path}")
+        return "\n".join(lines)
+
+    def write_json(self, path, slowest=10):
+        data = self.to_dict()
+        data["pages"] = self.slowest_pages(slowest)
+        data["page_count"] = len(self.pages)
+        with open(path, "w") as json_file:
+            json.dump(data, json_file, indent=2)
+
+
+class PhaseTimer:
+    __slots__ = ("stats", "name", "wall", "cpu", "nested_wall", "nested_cpu", "stack")
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.nested_wall = 0.0
+        self.nested_cpu = 0.0
+        self.stack = self.stats.open_phases()
+        self.stack.append(self)
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+        return self
+
+    def __exit__(self, *exc_info):
+        wall = time.perf_counter() - self.wall
+        cpu = time.thread_time() - self.cpu
+        self.stack.pop()
+        if self.stack:
+            parent = self.stack[-1]
+            parent.nested_wall += wall
+            parent.nested_cpu += cpu
+        self.stats.add_phase(self.name, wall - self.nested_wall, cpu - self.nested_cpu)
+        return False
+
+
+class NullStats:
+    # Shared do-nothing stand-in so hooks cost one attribute lookup when off.
+    enabled = False
+
+    def phase(self, name):
+        return null_timer
+
+    def count(self, name, amount=1):
+        pass
+
+    def add_page(self, path, seconds):
+        pass
+
+
+class NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+null_timer = NullTimer()
+null_stats = NullStats()
+active = null_stats
+
+
+def activate(stats):
+    global active
+    previous = active
+    active = stats
+    return previous
+
+
+def count_nodes(node):
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if node.children is not None:
+            stack.extend(node.children)
+    return count
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}"
+        size /= 1024
@@ -1,16 +1,184 @@
 import os
 import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 
+import assets
+import buildstats
+import minify
+import precompress
+from buildstats import format_bytes
 
-def copy_files_recursive(source_dir_path, dest_dir_path):
-    if not os.path.exists(dest_dir_path):
-        os.mkdir(dest_dir_path)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
-    for filename in os.listdir(source_dir_path):
-        from_path = os.path.join(source_dir_path, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
-        print(f" * {from_path} -> {dest_path}")
-        if os.path.isfile(from_path):
-            shutil.copy(from_path, dest_path)
+# ioctl request number for cloning a whole file on Linux (btrfs, xfs, ...).
+FICLONE = 0x40049409
+
+sync_modes = ("copy", "reflink", "hardlink")
+
+
+def copy_files_recursive(
+    source_dir_path, dest_dir_path, manifest=None, mode="copy", workers=1, extra_files=()
+):
+    # extra_files are (path, dest path) pairs for generated files, such as
+    # image variants, copied along with static/.
+    stats = buildstats.active
+    with stats.phase("static copy"):
+        files = discover_static_files(source_dir_path, dest_dir_path)
+        for from_path, dest_path in extra_files:
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            files.append((from_path, dest_path, os.stat(from_path)))
+        # Stylesheets with fingerprinted references, and minified files, are
+        # copied from their cached version.
+        copies = files
+        saved = {}
+        asset_map = assets.active
+        minifier = minify.active
+        if asset_map is not None and asset_map.rewritten:
+            copies = []
+            for from_path, dest_path, stat in files:
+                if from_path in asset_map.rewritten:
+                    from_path = asset_map.rewritten[from_path]
+                    stat = os.stat(from_path)
+                copies.append((from_path, dest_path, stat))
+        if minifier is not None:
+            file_hash = manifest.file_hash if manifest is not None else None
+            files_to_minify, copies = copies, []
+            for from_path, dest_path, stat in files_to_minify:
+                if minifier.wants(from_path):
+                    cache_path = minifier.static_file(from_path, file_hash)
+                    cache_stat = os.stat(cache_path)
+                    saved[dest_path] = stat.st_size - cache_stat.st_size
+                    from_path, stat = cache_path, cache_stat
+                copies.append((from_path, dest_path, stat))
+        pending = [
+            (from_path, dest_path, stat)
+            for from_path, dest_path, stat in copies
+            if not is_synced(stat, dest_path)
+        ]
+
+        precompressor = precompress.active
+
+        def copy_task(task):
+            from_path, dest_path, stat = task
+            sync_file(from_path, dest_path, mode)
+            if dest_path in saved:
+                minifier.count_saved(os.path.splitext(dest_path)[1][1:], saved[dest_path])
+            if precompressor is not None:
+                precompressor.compress_file(dest_path)
+            return stat.st_size
+
+        progress = CopyProgress(len(pending), sum(stat.st_size for _, _, stat in pending))
+        if workers > 1 and len(pending) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for size in executor.map(copy_task, pending):
+                    progress.update(size)
         else:
-            copy_files_recursive(from_path, dest_path)
+            for size in map(copy_task, pending):
+                progress.update(size)
+        progress.finish(len(files) - len(pending))
+    stats.count("static files copied", progress.files)
+    stats.count("bytes copied", progress.bytes)
+
+    if manifest is not None:
+        for from_path, dest_path, _ in files:
+            manifest.record(dest_path, [from_path])
+
+
+def discover_static_files(source_dir_path, dest_dir_path):
+    os.makedirs(dest_dir_path, exist_ok=True)
+    names = assets.active.names if assets.active is not None else {}
+    files = []
+    with os.scandir(source_dir_path) as entries:
+        for entry in entries:
+            if entry.is_file():
+                dest_path = os.path.join(dest_dir_path, names.get(entry.path, entry.name))
+                files.append((entry.path, dest_path, entry.stat()))
+            else:
+                files.extend(
+                    discover_static_files(entry.path, os.path.join(dest_dir_path, entry.name))
+                )
+    return files
+
+
+class CopyProgress:
+    def __init__(self, total_files, total_bytes, interval=1.0):
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.interval = interval
+        self.files = 0
+        self.bytes = 0
+        self.start = time.perf_counter()
+        self.last_report = self.start
+
+    def update(self, size):
+        self.files += 1
+        self.bytes += size
+        now = time.perf_counter()
+        if now - self.last_report >= self.interval and self.files < self.total_files:
+            self.last_report = now
+            print(
+                f" * {self.files}/{self.total_files} files, "
+                f"{format_bytes(self.bytes)}/{format_bytes(self.total_bytes)}"
+            )
+
+    def finish(self, unchanged):
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        print(
+            f" * copied {self.files} files ({format_bytes(self.bytes)}) in {elapsed:.2f}s "
+            f"({self.files / elapsed:.0f} files/s, {format_bytes(self.bytes / elapsed)}/s), "
+            f"{unchanged} unchanged"
+        )
+
+
+def is_synced(source_stat, dest_path):
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    return (
+        dest_stat.st_size == source_stat.st_size
+        and dest_stat.st_mtime_ns == source_stat.st_mtime_ns
+    )
+
+
+def sync_file(from_path, dest_path, mode="copy"):
+    # Never write through an existing destination: it may be a hard link
+    # to the source from an earlier --static-mode hardlink build.
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+    if mode == "hardlink":
+        try:
+            os.link(from_path, dest_path)
+            return
+        except OSError:
+            pass
+    elif mode == "reflink" and reflink_file(from_path, dest_path):
+        shutil.copystat(from_path, dest_path)
+        return
+    shutil.copy2(from_path, dest_path)
+
+
+def reflink_file(from_path, dest_path):
+    with open(from_path, "rb") as from_file, open(dest_path, "wb") as dest_file:
+        if fcntl is not None:
+            try:
+                fcntl.ioctl(dest_file.fileno(), FICLONE, from_file.fileno())
+                return True
+            except OSError:
+                pass
+        if hasattr(os, "copy_file_range"):
+            try:
+                remaining = os.fstat(from_file.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(from_file.fileno(), dest_file.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                return remaining == 0
+            except OSError:
+                pass
+    return False
@@ -0,0 +1,104 @@
+import os
+import random
+
+words = (
+    "the ring of power was forged in the fires of mount doom by sauron "
+    "while elves and dwarves and men of the west kept watch over middle earth"
+).split()
+
+default_block_mix = {
+    "heading": 1,
+    "paragraph": 4,
+    "ulist": 1,
+    "olist": 1,
+    "quote": 1,
+    "code": 1,
+}
+default_inline_mix = {
+    "text": 4,
+    "bold": 1,
+    "italic": 1,
+    "code": 1,
+    "link": 1,
+    "image": 0.25,
+}
+
+
+def synthetic_page(rng, size, block_mix=None, inline_mix=None):
+    block_mix = block_mix or default_block_mix
+    inline_mix = inline_mix or default_inline_mix
+    block_kinds = list(block_mix)
+    block_weights = [block_mix[kind] for kind in block_kinds]
+
+    blocks = [f"# Page {rng.randrange(10**6)}"]
+    length = len(blocks[0])
+    while length < size:
+        kind = rng.choices(block_kinds, block_weights)[0]
+        if kind == "heading":
+            block = f"{'#' * rng.randint(2, 6)} {sentence(rng, 4)}"
+        elif kind == "ulist":
+            block = "\n".join(f"- {inline(rng, inline_mix)}" for _ in range(rng.randint(2, 6)))
+        elif kind == "olist":
+            count = rng.randint(2, 6)
+            block = "\n".join(f"{i}. {inline(rng, inline_mix)}" for i in range(1, count + 1))
+        elif kind == "quote":
+            block = "\n".join(f"> {inline(rng, inline_mix)}" for _ in range(rng.randint(1, 3)))
+        elif kind == "code":
+            lines = [sentence(rng, rng.randint(3, 10)) for _ in range(rng.randint(1, 6))]
+            block = "```\n" + "\n".join(lines) + "\n```"
+        else:
+            block = "\n".join(inline(rng, inline_mix) for _ in range(rng.randint(2, 5)))
+        blocks.append(block)
+        length += len(block) + 2
+    return "\n\n".join(blocks) + "\n"
+
+
+def sentence(rng, count):
+    return " ".join(rng.choice(words) for _ in range(count))
+
+
+def inline(rng, inline_mix=None):
+    inline_mix = inline_mix or default_inline_mix
+    kinds = list(inline_mix)
+    weights = [inline_mix[kind] for kind in kinds]
+    parts = []
+    for kind in rng.choices(kinds, weights, k=rng.randint(3, 8)):
+        text = sentence(rng, rng.randint(1, 4))
+        if kind == "bold":
+            parts.append(f"**{text}**")
+        elif kind == "italic":
+            parts.append(f"_{text}_")
+        elif kind == "code":
+            parts.append(f"`{text}`")
+        elif kind == "link":
+            parts.append(f"[{text}](/blog/post-{rng.randrange(1000)})")
+        elif kind == "image":
+            parts.append(f"![{text}](/images/image-{rng.randrange(100)}.png)")
+        else:
+            parts.append(text)
+    return " ".join(parts)
+
+
+def generate_corpus(
+    dir_path,
+    pages,
+    depth=2,
+    fanout=8,
+    page_size=4096,
+    block_mix=None,
+    inline_mix=None,
+    seed=0,
+):
+    # Deterministic for a given seed: the same arguments always produce
+    # byte-identical content trees.
+    rng = random.Random(seed)
+    total_bytes = 0
+    for i in range(pages):
+        sections = [f"section-{rng.randrange(fanout)}" for _ in range(rng.randint(0, depth))]
+        page_dir = os.path.join(dir_path, *sections, f"page-{i}")
+        os.makedirs(page_dir, exist_ok=True)
+        markdown = synthetic_page(rng, page_size, block_mix, inline_mix)
+        with open(os.path.join(page_dir, "index.md"), "w") as page_file:
+            page_file.write(markdown)
+        total_bytes += len(markdown.encode("utf-8"))
+    return total_bytes
@@ -0,0 +1,100 @@
+import os
+import posixpath
+import re
+
+from inline_markdown import extract_markdown_images, extract_markdown_links
+
+code_span_pattern = re.compile(r"`[^`]*`")
+scheme_pattern = re.compile(r"[a-zA-Z][a-zA-Z0-9+.-]*:")
+
+
+def page_references(lines):
+    # (url, line number) pairs for the images and links in a page's lines
+    # (a list or an open file). Fenced and inline code is skipped because it
+    # is rendered verbatim.
+    images = []
+    links = []
+    in_fence = False
+    block_start = True
+    for line_number, line in enumerate(lines, 1):
+        line = line.rstrip("\n")
+        if in_fence:
+            if line.startswith("```"):
+                in_fence = False
+                block_start = True
+            continue
+        if line == "":
+            block_start = True
+            continue
+        if block_start and line.startswith("```") and "```" not in line[3:]:
+            in_fence = True
+            continue
+        block_start = False
+        text = code_span_pattern.sub("", line)
+        images.extend((url, line_number) for _, url in extract_markdown_images(text))
+        links.extend((url, line_number) for _, url in extract_markdown_links(text))
+    return images, links
+
+
+def page_url(dest_path, dest_dir_path):
+    return "/" + os.path.relpath(dest_path, dest_dir_path).replace(os.sep, "/")
+
+
+def site_path(url, from_url):
+    # The site-absolute path a reference points at, or None for external
+    # URLs and same-page anchors.
+    if url.startswith("//") or scheme_pattern.match(url):
+        return None
+    path = url.split("#", 1)[0].split("?", 1)[0]
+    if path == "":
+        return None
+    if not path.startswith("/"):
+        path = posixpath.join(posixpath.dirname(from_url), path)
+    trailing_slash = path.endswith("/")
+    path = posixpath.normpath(path)
+    if trailing_slash and path != "/":
+        path += "/"
+    return path
+
+
+def page_sources(path):
+    # Markdown files that could produce the page at a site path.
+    if path.endswith("/"):
+        return [path + "index.md"]
+    if path.endswith(".html"):
+        return [path[: -len(".html")] + ".md"]
+    return [path + ".md", path + "/index.md"]
+
+
+def resolve_references(references, from_url, dir_path_content, dir_path_static):
+    # Maps a page's references to the static files and content pages they
+    # name. A reference that resolves to neither is kept as the static path
+    # it would have, so creating that file later rebuilds the page.
+    static_paths = []
+    linked_pages = []
+    images, links = references
+    for url, _ in images + links:
+        path = site_path(url, from_url)
+        if path is None:
+            continue
+        static_path = None
+        if dir_path_static is not None:
+            static_path = os.path.join(dir_path_static, path.lstrip("/"))
+            if os.path.isfile(static_path):
+                if static_path not in static_paths:
+                    static_paths.append(static_path)
+                continue
+        for source in page_sources(path):
+            source_path = os.path.join(dir_path_content, source.lstrip("/"))
+            if os.path.isfile(source_path):
+                if source_path not in linked_pages:
+                    linked_pages.append(source_path)
+                break
+        else:
+            if (
+                static_path is not None
+                and not os.path.exists(static_path)
+                and static_path not in static_paths
+            ):
+                static_paths.append(static_path)
+    return static_paths, linked_pages
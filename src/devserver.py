@@ -0,0 +1,196 @@
+import functools
+import http.server
+import os
+import threading
+import time
+import urllib.parse
+
+livereload_path = "/__livereload"
+livereload_script = """<script>
+(function () {
+  var build = null;
+  function poll() {
+    fetch("/__livereload" + (build === null ? "" : "?since=" + build))
+      .then(function (response) { return response.text(); })
+      .then(function (current) {
+        if (build !== null && current !== build) {
+          location.reload();
+          return;
+        }
+        build = current;
+        poll();
+      })
+      .catch(function () { setTimeout(poll, 1000); });
+  }
+  poll();
+})();
+</script>"""
+
+
+class DevServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, directory, port):
+        handler = functools.partial(LiveReloadHandler, directory=directory)
+        super().__init__(("", port), handler)
+        self.build_id = 0
+        self.build_changed = threading.Condition()
+
+    def notify_rebuilt(self):
+        with self.build_changed:
+            self.build_id += 1
+            self.build_changed.notify_all()
+
+    def wait_for_build(self, since, timeout):
+        with self.build_changed:
+            self.build_changed.wait_for(lambda: self.build_id != since, timeout)
+            return self.build_id
+
+
+class LiveReloadHandler(http.server.SimpleHTTPRequestHandler):
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == livereload_path:
+            self.send_build_id(urllib.parse.parse_qs(url.query))
+            return
+        file_path = self.translate_path(self.path)
+        if os.path.isdir(file_path) and url.path.endswith("/"):
+            file_path = os.path.join(file_path, "index.html")
+        if not file_path.endswith(".html") or not os.path.isfile(file_path):
+            super().do_GET()
+            return
+        with open(file_path, "r") as html_file:
+            body = inject_livereload(html_file.read()).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_build_id(self, query):
+        if "since" in query:
+            build_id = self.server.wait_for_build(int(query["since"][0]), 25)
+        else:
+            build_id = self.server.build_id
+        body = str(build_id).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def inject_livereload(html):
+    # The script is only added to served responses, never to files in docs/.
+    index = html.rfind("</body>")
+    if index == -1:
+        return html + livereload_script
+    return html[:index] + livereload_script + html[index:]
+
+
+class TreeWatcher:
+    # Polls watched trees for changes. Each poll stats only directories and
+    # lists the ones whose mtime moved, which catches added, removed and
+    # renamed files (editors that save by renaming included); files edited
+    # in place keep their directory's mtime, so every full_scan_every polls
+    # all files are statted as well.
+    def __init__(self, paths, full_scan_every=5):
+        self.paths = paths
+        self.full_scan_every = full_scan_every
+        self.polls = 0
+        self.dirs = {}
+        self.files = self.scan(True)
+
+    def poll(self):
+        self.polls += 1
+        current = self.scan(self.polls % self.full_scan_every == 0)
+        changed = changed_paths(self.files, current)
+        self.files = current
+        return changed
+
+    def scan(self, full):
+        files = {}
+        dirs = {}
+        for path in self.paths:
+            if os.path.isdir(path):
+                self.scan_dir(path, full, files, dirs)
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files[path] = (stat.st_size, stat.st_mtime_ns)
+        self.dirs = dirs
+        return files
+
+    def scan_dir(self, dir_path, full, files, dirs):
+        try:
+            mtime = os.stat(dir_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        cached = self.dirs.get(dir_path)
+        if cached is not None and cached[0] == mtime and not full:
+            dir_files, subdirs = cached[1], cached[2]
+        else:
+            dir_files = {}
+            subdirs = []
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            subdirs.append(entry.path)
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    dir_files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        dirs[dir_path] = (mtime, dir_files, subdirs)
+        files.update(dir_files)
+        for subdir in subdirs:
+            self.scan_dir(subdir, full, files, dirs)
+
+
+def changed_paths(before, after):
+    changed = set()
+    for path, stat in after.items():
+        if before.get(path) != stat:
+            changed.add(path)
+    for path in before:
+        if path not in after:
+            changed.add(path)
+    return sorted(changed)
+
+
+def serve_and_watch(directory, port, paths, rebuild, interval=0.2):
+    server = DevServer(directory, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Serving {directory} at http://localhost:{port}/ (watching for changes)")
+
+    watcher = TreeWatcher(paths)
+    try:
+        while True:
+            time.sleep(interval)
+            changed = watcher.poll()
+            if not changed:
+                continue
+            for path in changed:
+                print(f" * changed {path}")
+            start = time.perf_counter()
+            try:
+                rebuild(changed)
+            except Exception as e:
+                print(f"Rebuild failed: {e}")
+                continue
+            print(f"Rebuilt in {(time.perf_counter() - start) * 1000:.1f} ms")
+            server.notify_rebuilt()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
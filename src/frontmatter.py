@@ -0,0 +1,59 @@
+import itertools
+import re
+
+delimiter = "---"
+key_pattern = re.compile(r"([A-Za-z_][\w-]*):(?:\s+(.*))?$")
+int_pattern = re.compile(r"-?\d+$")
+scalars = {"true": True, "false": False, "null": None, "~": None}
+
+
+def split_front_matter(lines):
+    # Reads YAML-style front matter from the head of a page's lines (a list
+    # or an open file) and returns (metadata, remaining lines). Only the
+    # front matter is consumed, so the body can still be streamed.
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return {}, iter(())
+    if first.rstrip("\n") != delimiter:
+        return {}, itertools.chain([first], lines)
+
+    metadata = {}
+    key = None
+    for line in lines:
+        line = line.rstrip("\n")
+        if line in (delimiter, "..."):
+            return metadata, lines
+        stripped = line.strip()
+        if stripped == "" or stripped.startswith("#"):
+            continue
+        if stripped.startswith("- ") and key is not None and line[0] in " -":
+            # A block list item under the last key.
+            if not isinstance(metadata[key], list):
+                if metadata[key] is not None:
+                    raise ValueError(f"invalid front matter line: {line}")
+                metadata[key] = []
+            metadata[key].append(parse_value(stripped[2:]))
+            continue
+        match = key_pattern.match(line)
+        if match is None:
+            raise ValueError(f"invalid front matter line: {line}")
+        key, value = match.groups()
+        metadata[key] = parse_value(value) if value else None
+    raise ValueError("unterminated front matter")
+
+
+def parse_value(value):
+    value = value.strip()
+    if value.startswith("[") and value.endswith("]"):
+        inner = value[1:-1].strip()
+        return [parse_value(item) for item in inner.split(",")] if inner else []
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    if " #" in value:
+        value = value.split(" #", 1)[0].rstrip()
+    if value.lower() in scalars:
+        return scalars[value.lower()]
+    if int_pattern.match(value):
+        return int(value)
+    return value
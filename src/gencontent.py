@@ -1,45 +1,724 @@
+import io
+import multiprocessing
 import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from markdown_blocks import markdown_to_html_node
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    for filename in os.listdir(dir_path_content):
+import assets
+import buildstats
+import highlight
+import images
+import minify
+import pageindex
+import parsecache
+import precompress
+import rendercache
+import search
+from buildstats import count_nodes
+from dependencies import page_references, page_url, resolve_references
+from frontmatter import split_front_matter
+from htmlnode import LeafNode
+from markdown_blocks import block_to_html_node, iter_blocks
+from template import (
+    basepath_marker,
+    fill_root_urls,
+    load_template,
+    rewrite_root_url,
+    url_context,
+)
+
+# Pages larger than this are streamed from disk to disk instead of being
+# held in memory while they wait in the pipeline.
+stream_threshold = 4 * 2**20
+pipeline_depth = 8
+
+
+def generate_pages_recursive(
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    basepath,
+    manifest=None,
+    jobs=1,
+    dir_path_static=None,
+):
+    stats = buildstats.active
+    with stats.phase("discovery"):
+        # Front matter is scanned before anything is rendered, so drafts are
+        # dropped without their bodies ever being parsed.
+        page_index = pageindex.scan_pages(discover_pages(dir_path_content, dest_dir_path))
+    generate_pages(
+        page_index.pages,
+        dir_path_content,
+        template_path,
+        dest_dir_path,
+        basepath,
+        manifest,
+        jobs,
+        dir_path_static,
+    )
+    return page_index
+
+
+def generate_pages(
+    page_infos,
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    basepath,
+    manifest=None,
+    jobs=1,
+    dir_path_static=None,
+):
+    # Renders the given pages of the page index, skipping those the manifest
+    # has as up to date.
+    stats = buildstats.active
+    with stats.phase("discovery"):
+        # With fingerprinting, the assets the template links to are baked
+        # into every page.
+        template_assets = []
+        if assets.active is not None:
+            for url in load_template(template_path).root_urls():
+                source = assets.active.sources.get(url.split("?", 1)[0].split("#", 1)[0])
+                if source is not None and source not in template_assets:
+                    template_assets.append(source)
+                    # A stylesheet's name changes with the files it references.
+                    template_assets += [
+                        path
+                        for path in assets.active.dependencies.get(source, [])
+                        if path not in template_assets
+                    ]
+
+        index_search = manifest is not None and search.active is not None
+        pages = []
+        # Search records carry over from the manifest for pages rebuilt only
+        # because the template or a static file changed; the rest have their
+        # terms collected while they render.
+        search_records = {}
+        search_paths = set()
+        for page in page_infos:
+            from_path, dest_path = page.from_path, page.dest_path
+            if manifest is not None:
+                # Static files the page referenced last time are inputs too.
+                sources = [from_path, template_path] + template_assets
+                sources += [path for path in manifest.dependencies(dest_path) if path not in sources]
+                if manifest.up_to_date(dest_path, sources):
+                    continue
+            if index_search:
+                record = manifest.unchanged_detail(dest_path, from_path, "search")
+                if record is not None:
+                    search_records[dest_path] = record
+                else:
+                    search_paths.add(from_path)
+            pages.append((from_path, dest_path))
+
+    track_references = manifest is not None
+    if jobs > 1 and len(pages) > 1:
+        batch_size = max(1, len(pages) // (jobs * 4))
+        batches = []
+        for i in range(0, len(pages), batch_size):
+            batch_pages = pages[i : i + batch_size]
+            batch_search_paths = {path for path, _ in batch_pages if path in search_paths}
+            batches.append(
+                (
+                    batch_pages,
+                    template_path,
+                    basepath,
+                    stats.enabled,
+                    track_references,
+                    batch_search_paths,
+                )
+            )
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            mp_context=pool_context(),
+            initializer=init_worker,
+            initargs=(worker_state(),),
+        ) as executor:
+            batch_results = list(executor.map(generate_page_batch, batches))
+    elif pages:
+        batch = (pages, template_path, basepath, stats.enabled, track_references, search_paths)
+        batch_results = [generate_page_batch(batch, False)]
+    else:
+        batch_results = []
+
+    results = []
+    for page_results, batch_stats, deltas in batch_results:
+        results.extend(page_results)
+        if batch_stats is not None:
+            stats.merge(batch_stats)
+        if deltas is not None:
+            merge_worker_deltas(deltas)
+
+    errors = []
+    for (from_path, dest_path), (error, references, search_record) in zip(pages, results):
+        print(f" * {from_path} {template_path} -> {dest_path}")
+        if error is not None:
+            errors.append(f"{from_path}: {error}")
+            continue
+        if manifest is not None:
+            static_paths, linked_pages = resolve_references(
+                references, page_url(dest_path, dest_dir_path), dir_path_content, dir_path_static
+            )
+            image_refs, link_refs = references
+            details = {
+                "source": from_path,
+                "references": {"images": image_refs, "links": link_refs},
+                "linked_pages": linked_pages,
+            }
+            if search_record is None:
+                search_record = search_records.get(dest_path)
+            if search_record is not None:
+                details["search"] = search_record
+            manifest.record(
+                dest_path, [from_path, template_path] + template_assets + static_paths, details
+            )
+    if errors:
+        raise ValueError(f"{len(errors)} page(s) failed to build:\n" + "\n".join(errors))
+
+
+def pool_context():
+    # Static files are copied on a thread while pages render, and forking a
+    # process that has other threads running can deadlock the children.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context()
+
+
+def worker_state():
+    # Worker processes start fresh, so the caches active in the parent are
+    # handed to them explicitly.
+    render_cache = rendercache.active
+    parse_cache = parsecache.active
+    highlighter = highlight.active
+    precompressor = precompress.active
+    return {
+        "assets": assets.active,
+        "images": images.active,
+        "minify": minify.active.dir_path_cache if minify.active is not None else None,
+        "render_cache": (
+            (dict(render_cache.entries), render_cache.max_entries)
+            if render_cache is not None
+            else None
+        ),
+        "parse_cache": parse_cache.dir_path if parse_cache is not None else None,
+        "highlight": (
+            (dict(highlighter.cache.entries), highlighter.cache.max_entries)
+            if highlighter is not None
+            else None
+        ),
+        "precompress": (
+            (precompressor.encodings, precompressor.min_size)
+            if precompressor is not None
+            else None
+        ),
+    }
+
+
+def init_worker(state):
+    assets.activate(state["assets"])
+    images.activate(state["images"])
+    if state["minify"] is not None:
+        minify.activate(minify.Minifier(state["minify"]))
+    if state["render_cache"] is not None:
+        rendercache.init_worker(*state["render_cache"])
+    if state["highlight"] is not None:
+        highlight.init_worker(*state["highlight"])
+    if state["parse_cache"] is not None:
+        parsecache.activate(parsecache.ParseCache(state["parse_cache"]))
+    if state["precompress"] is not None:
+        precompress.activate(precompress.Precompressor(*state["precompress"]))
+
+
+def discover_pages(dir_path_content, dest_dir_path):
+    pages = []
+    for filename in sorted(os.listdir(dir_path_content)):
         from_path = os.path.join(dir_path_content, filename)
         dest_path = os.path.join(dest_dir_path, filename)
         if os.path.isfile(from_path):
-            dest_path = Path(dest_path).with_suffix(".html")
-            generate_page(from_path, template_path, dest_path, basepath)
+            pages.append((from_path, Path(dest_path).with_suffix(".html")))
         else:
-            generate_pages_recursive(from_path, template_path, dest_path, basepath)
+            pages.extend(discover_pages(from_path, dest_path))
+    return pages
+
+
+def generate_page_batch(batch, in_worker=True):
+    # Runs in a worker process, or in-process for serial builds. Returns the
+    # (error, references, search record) of each page in order, plus the
+    # batch's stats and, from a worker, worker_deltas() for the parent to
+    # merge, so a failing page never kills the pool. In-process batches
+    # record into the active stats directly, since the static copy thread
+    # records into them at the same time.
+    pages, template_path, basepath, profile, track_references, search_paths = batch
+    if not in_worker:
+        results = run_pipeline(pages, template_path, basepath, track_references, search_paths)
+        return results, None, None
+    stats = buildstats.BuildStats() if profile else buildstats.null_stats
+    previous = buildstats.activate(stats)
+    try:
+        results = run_pipeline(pages, template_path, basepath, track_references, search_paths)
+    finally:
+        buildstats.activate(previous)
+    return results, stats.to_dict() if profile else None, worker_deltas()
 
-def generate_page(from_path, template_path, dest_path, basepath):
-    print(f" * {from_path} {template_path} -> {dest_path}")
+
+def worker_deltas():
+    # What this process added to the build-wide caches and tallies since
+    # the last call: rendered blocks, highlighted code and minify savings.
+    cache = rendercache.active
+    highlighter = highlight.active
+    minifier = minify.active
+    return {
+        "render_cache": cache.drain() if cache is not None else None,
+        "highlight": highlighter.cache.drain() if highlighter is not None else None,
+        "minify": minifier.drain() if minifier is not None else None,
+    }
+
+
+def merge_worker_deltas(deltas):
+    if deltas["render_cache"] is not None:
+        rendercache.active.merge(deltas["render_cache"])
+    if deltas["highlight"] is not None:
+        highlight.active.cache.merge(deltas["highlight"])
+    if deltas["minify"] is not None:
+        minify.active.merge(deltas["minify"])
+
+
+def run_pipeline(pages, template_path, basepath, track_references, search_paths=()):
+    # A reader thread prefetches sources and a writer thread creates
+    # directories and writes pages. Bounded queues connect both to the
+    # rendering in this thread, so disk latency overlaps CPU work. Pages in
+    # search_paths get their search terms collected as they render.
+    stats = buildstats.active
+    read_queue = queue.Queue(maxsize=pipeline_depth)
+    write_queue = queue.Queue(maxsize=pipeline_depth)
+    reader = threading.Thread(target=read_sources, args=(pages, read_queue), daemon=True)
+    writer = PageWriter(write_queue)
+    reader.start()
+    writer.start()
+
+    results = []
+    try:
+        for from_path, dest_path in pages:
+            source = read_queue.get()
+            start = time.perf_counter()
+            error = None
+            references = None
+            search_record = None
+            terms = {} if from_path in search_paths else None
+            try:
+                if isinstance(source, Exception):
+                    raise source
+                if source is None:
+                    title = generate_page(from_path, template_path, dest_path, basepath, terms)
+                    if precompress.active is not None:
+                        precompress.active.compress_file(dest_path)
+                    if track_references:
+                        with open(from_path, "r") as from_file:
+                            references = page_references(from_file)
+                else:
+                    title, page, entry = render_source(source, template_path, basepath, terms)
+                    if track_references:
+                        references = page_references(source.text.split("\n"))
+                    write_queue.put((dest_path, page, entry))
+                if terms is not None:
+                    search_record = [title, terms]
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            else:
+                stats.count("pages")
+                stats.add_page(from_path, time.perf_counter() - start)
+            results.append((error, references, search_record))
+    finally:
+        write_queue.put(None)
+        writer.join()
+
+    return [
+        (writer.errors.get(dest_path, error), references, search_record)
+        for (_, dest_path), (error, references, search_record) in zip(pages, results)
+    ]
+
+
+class PageSource:
+    __slots__ = ("text", "cache_key", "cached")
+
+    def __init__(self, text, cache_key=None, cached=None):
+        self.text = text
+        self.cache_key = cache_key
+        self.cached = cached
+
+
+def read_sources(pages, read_queue):
+    stats = buildstats.active
+    for from_path, _ in pages:
+        try:
+            with stats.phase("read"):
+                source = read_source(from_path)
+        except Exception as e:
+            source = e
+        read_queue.put(source)
+
+
+def read_source(from_path):
+    # None tells the renderer to stream the page itself.
+    if os.stat(from_path).st_size > stream_threshold:
+        return None
     with open(from_path, "r") as from_file:
-        markdown_content = from_file.read()
+        source = PageSource(from_file.read())
+    cache = parsecache.active
+    if cache is not None:
+        source.cache_key = cache.text_key(source.text)
+    if source.cache_key is not None:
+        entry_path = cache.entry_path(source.cache_key)
+        try:
+            with open(entry_path, "r") as cached_file:
+                source.cached = cached_file.read()
+            os.utime(entry_path)
+        except FileNotFoundError:
+            pass
+    return source
+
+
+def render_source(source, template_path, basepath, terms=None):
+    # Returns the title, the page and, on a parse cache miss, the (path,
+    # text) of the cache entry to write next to it.
+    stats = buildstats.active
+    entry = None
+    if source.cached is not None:
+        stats.count("parse cache hits")
+        title, _, article = source.cached.partition("\n")
+        article = fill_root_urls(article, basepath)
+        if terms is not None:
+            with stats.phase("search index"):
+                terms.update(search.page_terms(split_page(source.text.split("\n"))[1]))
+    else:
+        with stats.phase("render"):
+            title, lines = split_page(source.text.split("\n"))
+            content_basepath = basepath_marker if source.cache_key is not None else basepath
+            buffer = io.StringIO()
+            MarkdownContent(lines, content_basepath, terms).write_html(buffer)
+            article = buffer.getvalue()
+        if source.cache_key is not None:
+            stats.count("parse cache misses")
+            entry = (parsecache.active.entry_path(source.cache_key), f"{title}\n{article}")
+            article = fill_root_urls(article, basepath)
+
+    with stats.phase("template fill"):
+        template = load_template(template_path)
+        page = template.render({"Title": title, "Content": article}, basepath)
+    return title, page, entry
+
+
+class PageWriter(threading.Thread):
+    # Writes rendered pages, their precompressed siblings and parse cache
+    # entries in arrival order, creating each directory only once.
+    def __init__(self, write_queue):
+        super().__init__(daemon=True)
+        self.write_queue = write_queue
+        self.made_dirs = set()
+        self.errors = {}
 
-    with open(template_path, "r") as template_file:
-        template = template_file.read()
+    def run(self):
+        stats = buildstats.active
+        precompressor = precompress.active
+        minifier = minify.active
+        while True:
+            item = self.write_queue.get()
+            if item is None:
+                return
+            dest_path, page, entry = item
+            try:
+                if minifier is not None:
+                    with stats.phase("minify"):
+                        page = minifier.html(page)
+                with stats.phase("write"):
+                    if entry is not None:
+                        self.write(*entry)
+                    self.write(dest_path, page)
+                if precompressor is not None:
+                    with stats.phase("precompress"):
+                        precompressor.write(dest_path, page.encode("utf-8"))
+                if stats.enabled:
+                    stats.count("bytes written", len(page.encode("utf-8")))
+            except Exception as e:
+                self.errors[dest_path] = f"{type(e).__name__}: {e}"
 
-    node = markdown_to_html_node(markdown_content)
-    html = node.to_html()
+    def write(self, path, text):
+        dir_path = os.path.dirname(path)
+        if dir_path not in self.made_dirs:
+            if dir_path != "":
+                os.makedirs(dir_path, exist_ok=True)
+            self.made_dirs.add(dir_path)
+        write_page(path, lambda to_file: to_file.write(text))
 
-    title = extract_title(markdown_content)
-    template = template.replace("{{ Title }}", title)
-    template = template.replace("{{ Content }}", html)
-    
-    # Replace root-relative URLs with basepath
-    template = template.replace('href="/', f'href="{basepath}')
-    template = template.replace('src="/', f'src="{basepath}')
 
+def generate_page(from_path, template_path, dest_path, basepath, terms=None):
+    # Returns the page title; a terms dict is filled with the page's search
+    # terms as it renders.
+    stats = buildstats.active
+    cache = parsecache.active
+    key = cache.key(from_path) if cache is not None else None
+    if key is not None:
+        return generate_page_cached(
+            stats, cache, key, from_path, template_path, dest_path, basepath, terms
+        )
+
+    # Streaming interleaves rendering with the write, so both are timed as
+    # one phase here.
+    with stats.phase("render"):
+        template = load_template(template_path)
+        title = extract_title_from_file(from_path)
+        make_parent_dirs(dest_path)
+        with open(from_path, "r") as from_file:
+            body = split_front_matter(from_file)[1]
+            values = {"Title": title, "Content": MarkdownContent(body, basepath, terms)}
+            write_template_page(dest_path, template, values, basepath)
+    return title
+
+
+class MarkdownContent:
+    # Renders markdown lines (a list or an open file) block by block while
+    # the page is being written, so only one block's nodes are in memory.
+    def __init__(self, lines, basepath, terms=None):
+        self.lines = lines
+        self.basepath = basepath
+        self.terms = terms
+
+    def write_html(self, fp):
+        stats = buildstats.active
+        fp.write("<div>")
+        if not stats.enabled:
+            for node in render_blocks(iter_blocks(self.lines), self.basepath, self.terms):
+                node.write_html(fp)
+        else:
+            blocks = timed_blocks(iter_blocks(self.lines), stats)
+            for node in render_blocks(blocks, self.basepath, self.terms):
+                with stats.phase("serialize"):
+                    node.write_html(fp)
+        fp.write("</div>")
+
+
+def timed_blocks(blocks, stats):
+    # Times block splitting on its own, apart from the inline parsing and
+    # serialization that consume each block.
+    while True:
+        with stats.phase("parse blocks"):
+            item = next(blocks, None)
+        if item is None:
+            return
+        yield item
+
+
+class CachedContent:
+    # Streams cached article HTML, filling in the basepath as it goes.
+    def __init__(self, cached_file, basepath):
+        self.cached_file = cached_file
+        self.basepath = basepath
+
+    def write_html(self, fp):
+        pending = ""
+        for chunk in iter(lambda: self.cached_file.read(1 << 16), ""):
+            # Hold back a URL cut off at the end of the chunk.
+            text = pending + chunk
+            cut = text.rfind(basepath_marker)
+            if cut != -1 and '"' not in text[cut:]:
+                text, pending = text[:cut], text[cut:]
+            else:
+                pending = ""
+            fp.write(fill_root_urls(text, self.basepath))
+        fp.write(fill_root_urls(pending, self.basepath))
+
+
+def generate_page_cached(
+    stats, cache, key, from_path, template_path, dest_path, basepath, terms=None
+):
+    # The article is rendered once per distinct source, with a marker in
+    # place of the basepath; template or basepath changes only refill it.
+    entry_path = cache.entry_path(key)
+    if os.path.exists(entry_path):
+        stats.count("parse cache hits")
+        os.utime(entry_path)
+        if terms is not None:
+            with stats.phase("search index"), open(from_path, "r") as from_file:
+                terms.update(search.page_terms(split_front_matter(from_file)[1]))
+    else:
+        stats.count("parse cache misses")
+        with stats.phase("render"):
+            title = extract_title_from_file(from_path)
+
+            def write_entry(to_file):
+                to_file.write(title + "\n")
+                with open(from_path, "r") as from_file:
+                    body = split_front_matter(from_file)[1]
+                    MarkdownContent(body, basepath_marker, terms).write_html(to_file)
+
+            make_parent_dirs(entry_path)
+            write_page(entry_path, write_entry)
+
+    with stats.phase("template fill"):
+        template = load_template(template_path)
+        with open(entry_path, "r") as cached_file:
+            title = cached_file.readline()[:-1]
+            values = {"Title": title, "Content": CachedContent(cached_file, basepath)}
+            make_parent_dirs(dest_path)
+            write_template_page(dest_path, template, values, basepath)
+    return title
+
+
+def render_blocks(blocks, basepath, terms=None):
+    # With a render cache active, blocks seen before (on this page, another
+    # page, or a previous run) are emitted as their cached HTML. A terms
+    # dict collects search terms from the nodes as they are built.
+    stats = buildstats.active
+    cache = rendercache.active
+    context = url_context(basepath)
+    if highlight.active is not None:
+        context += "\0highlight"
+    for block, block_type in blocks:
+        if cache is None:
+            node = block_to_html_node(block, block_type)
+            finish_node(node, basepath)
+            if stats.enabled:
+                stats.count("nodes", count_nodes(node))
+            if terms is not None:
+                with stats.phase("search index"):
+                    search.add_node_terms(terms, node)
+            yield node
+            continue
+        key = cache.key(block, block_type, context)
+        html = cache.get(key)
+        if html is None:
+            node = block_to_html_node(block, block_type)
+            finish_node(node, basepath)
+            if stats.enabled:
+                stats.count("nodes", count_nodes(node))
+            if terms is not None:
+                with stats.phase("search index"):
+                    search.add_node_terms(terms, node)
+            with stats.phase("serialize"):
+                html = node.to_html()
+            cache.put(key, html)
+        elif terms is not None:
+            with stats.phase("search index"):
+                search.add_block_terms(terms, block, block_type)
+        yield LeafNode(None, html)
+
+
+def write_template_page(dest_path, template, values, basepath):
+    # Streams a filled template into dest_path, through the minifier when
+    # one is active.
+    minifier = minify.active
+
+    def write(to_file):
+        if minifier is None:
+            template.write(to_file, values, basepath)
+            return
+        stream = minifier.stream(to_file)
+        template.write(stream, values, basepath)
+        stream.close()
+
+    write_page(dest_path, write)
+    stats = buildstats.active
+    if stats.enabled:
+        stats.count("bytes written", os.stat(dest_path).st_size)
+
+
+def write_page(dest_path, write):
+    # Rendering happens during the write, so a bad block must not leave a
+    # truncated page behind: write to a temporary file and swap it in.
+    # The process id keeps workers rendering identical sources into the
+    # same parse cache entry from clobbering each other's temporary file.
+    tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w") as to_file:
+            write(to_file)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def make_parent_dirs(dest_path):
     dest_dir_path = os.path.dirname(dest_path)
     if dest_dir_path != "":
         os.makedirs(dest_dir_path, exist_ok=True)
 
-    with open(dest_path, "w") as to_file:
-        to_file.write(template)
+
+def finish_node(node, basepath):
+    if images.active is not None:
+        decorate_images(node, images.active)
+    rewrite_root_urls(node, basepath)
+
+
+def decorate_images(node, image_map):
+    # Adds the intrinsic size, lazy loading and a srcset of downscaled
+    # variants to img tags for known images, before their URLs are rewritten.
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node.tag == "img" and node.props is not None:
+            src = node.props.get("src", "")
+            info = image_map.get(src)
+            if info is not None:
+                width, height, variants = info
+                node.props["width"] = str(width)
+                node.props["height"] = str(height)
+                node.props["loading"] = "lazy"
+                if variants:
+                    candidates = [f"{path} {size}w" for path, size in variants]
+                    candidates.append(f"{src} {width}w")
+                    node.props["srcset"] = ", ".join(candidates)
+                    node.props["sizes"] = f"(max-width: {width}px) 100vw, {width}px"
+        if node.children is not None:
+            stack.extend(node.children)
+
+
+def rewrite_root_urls(node, basepath):
+    # Only rewrite URL attributes, never text that merely looks like one.
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node.props is not None:
+            for prop in ("href", "src"):
+                if prop in node.props:
+                    node.props[prop] = rewrite_root_url(node.props[prop], basepath)
+            if "srcset" in node.props:
+                candidates = []
+                for candidate in node.props["srcset"].split(", "):
+                    url, _, descriptor = candidate.partition(" ")
+                    candidates.append(f"{rewrite_root_url(url, basepath)} {descriptor}")
+                node.props["srcset"] = ", ".join(candidates)
+        if node.children is not None:
+            stack.extend(node.children)
+
 
 def extract_title(md):
-    lines = md.split("\n")
+    return split_page(md.split("\n"))[0]
+
+
+def extract_title_from_file(path):
+    with open(path, "r") as from_file:
+        metadata, body = split_front_matter(from_file)
+        if metadata.get("title") is not None:
+            return str(metadata["title"])
+        return extract_title_from_lines(line.rstrip("\n") for line in body)
+
+
+def split_page(lines):
+    # The title and body lines of a page, with any front matter removed; a
+    # title set in the front matter wins over the first heading.
+    metadata, body = split_front_matter(lines)
+    body = list(body)
+    if metadata.get("title") is not None:
+        return str(metadata["title"]), body
+    return extract_title_from_lines(body), body
+
+
+def extract_title_from_lines(lines):
     for line in lines:
         if line.startswith("# "):
             return line[2:]
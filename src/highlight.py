@@ -0,0 +1,147 @@
+import hashlib
+import html
+import re
+
+import buildstats
+from rendercache import RenderCache
+
+string_patterns = r""""(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'"""
+
+# Each lexer is a list of (class, pattern) pairs tried in order at every
+# position; text no pattern matches is emitted unstyled.
+python_rules = [
+    ("comment", r"#[^\n]*"),
+    (
+        "string",
+        r"(?i:[rbuf]{0,2})(?:\"\"\"[\s\S]*?\"\"\"|'''[\s\S]*?'''|" + string_patterns + ")",
+    ),
+    ("decorator", r"@[\w.]+"),
+    (
+        "keyword",
+        r"\b(?:and|as|assert|async|await|break|class|continue|def|del|elif|else|except|"
+        r"finally|for|from|global|if|import|in|is|lambda|nonlocal|not|or|pass|raise|"
+        r"return|try|while|with|yield|None|True|False)\b",
+    ),
+    (
+        "builtin",
+        r"\b(?:abs|all|any|bool|dict|enumerate|float|getattr|int|isinstance|len|list|"
+        r"map|max|min|open|print|range|repr|self|set|sorted|str|sum|super|tuple|type|zip)\b",
+    ),
+    ("number", r"\b(?:0[xob][\da-fA-F_]+|\d[\d_]*(?:\.\d*)?(?:[eE][+-]?\d+)?j?)\b"),
+]
+shell_rules = [
+    ("comment", r"(?<!\S)#[^\n]*"),
+    ("string", string_patterns),
+    ("variable", r"\$(?:\{[^}\n]*\}|\w+|[@#?$!*-])"),
+    (
+        "keyword",
+        r"\b(?:case|do|done|elif|else|esac|export|fi|for|function|if|in|local|return|"
+        r"select|then|until|while)\b",
+    ),
+    (
+        "builtin",
+        r"(?<![\w/.-])(?:cat|cd|cp|curl|echo|git|grep|ls|mkdir|mv|pip|python3?|rm|sed|"
+        r"set|source|sudo)(?![\w/.-])",
+    ),
+]
+json_rules = [
+    ("property", r'"(?:\\.|[^"\\\n])*"(?=\s*:)'),
+    ("string", r'"(?:\\.|[^"\\\n])*"'),
+    ("keyword", r"\b(?:true|false|null)\b"),
+    ("number", r"-?\b\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b"),
+]
+html_rules = [
+    ("comment", r"<!--[\s\S]*?-->"),
+    ("tag", r"</?[A-Za-z][\w:-]*|/?>|<!\w+"),
+    ("attribute", r"(?<=\s)[A-Za-z_:][\w:.-]*(?=\s*=)"),
+    ("string", string_patterns),
+]
+css_rules = [
+    ("comment", r"/\*[\s\S]*?\*/"),
+    ("string", string_patterns),
+    ("keyword", r"@[\w-]+|!important\b"),
+    ("property", r"(?<![\w-])-{0,2}[A-Za-z][\w-]*(?=\s*:[^{};]*[;}])"),
+    ("number", r"#[\da-fA-F]{3,8}\b|-?(?<![\w-])\d*\.?\d+(?:%|[A-Za-z]+)?"),
+]
+
+lexers = {
+    "python": python_rules,
+    "shell": shell_rules,
+    "json": json_rules,
+    "html": html_rules,
+    "css": css_rules,
+}
+aliases = {
+    "bash": "shell",
+    "console": "shell",
+    "htm": "html",
+    "py": "python",
+    "python3": "python",
+    "sh": "shell",
+    "xml": "html",
+    "zsh": "shell",
+}
+# Group names carry the rule index, since a class can have several rules.
+patterns = {
+    language: re.compile(
+        "|".join(f"(?P<{name}_{i}>{pattern})" for i, (name, pattern) in enumerate(rules))
+    )
+    for language, rules in lexers.items()
+}
+
+active = None
+
+
+class Highlighter:
+    # Highlighted HTML is memoized by language and code, in a cache kept
+    # across pages and runs like the render cache.
+    def __init__(self, max_entries=10000):
+        self.cache = RenderCache(max_entries)
+
+    @staticmethod
+    def key(language, code):
+        return hashlib.sha1(f"{language}\0{code}".encode("utf-8")).hexdigest()
+
+    def highlight(self, language, code):
+        # Returns the highlighted HTML of code, or None for languages
+        # without a lexer.
+        language = aliases.get(language, language)
+        if language not in patterns:
+            return None
+        stats = buildstats.active
+        key = self.key(language, code)
+        html_code = self.cache.get(key)
+        if html_code is not None:
+            stats.count("highlight cache hits")
+            return html_code
+        stats.count("highlight cache misses")
+        with stats.phase("highlight"):
+            html_code = highlight_code(patterns[language], code)
+        self.cache.put(key, html_code)
+        return html_code
+
+
+def highlight_code(pattern, code):
+    output = []
+    position = 0
+    for match in pattern.finditer(code):
+        output.append(html.escape(code[position : match.start()], quote=False))
+        name = match.lastgroup.rsplit("_", 1)[0]
+        text = html.escape(match.group(), quote=False)
+        output.append(f'<span class="hl-{name}">{text}</span>')
+        position = match.end()
+    output.append(html.escape(code[position:], quote=False))
+    return "".join(output)
+
+
+def init_worker(entries, max_entries):
+    highlighter = Highlighter(max_entries)
+    highlighter.cache.entries.update(entries)
+    activate(highlighter)
+
+
+def activate(highlighter):
+    global active
+    previous = active
+    active = highlighter
+    return previous
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import posixpath
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+import buildstats
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+image_extensions = (".gif", ".jpeg", ".jpg", ".png", ".webp")
+resizable_extensions = (".jpeg", ".jpg", ".png", ".webp")
+variant_widths = (480, 960, 1440)
+
+active = None
+
+
+class ImageMap:
+    def __init__(self):
+        self.images = {}
+        self.variants = []
+        self.digest = ""
+
+    def add(self, site_path, width, height, variants):
+        # variants are (cache path, site path, width) triples.
+        self.images[site_path] = (width, height, [(path, size) for _, path, size in variants])
+        self.variants.extend((cache_path, path) for cache_path, path, _ in variants)
+
+    def finish(self):
+        # Identifies this set of sizes and variants, for caches of rendered
+        # img tags.
+        data = json.dumps(self.images, sort_keys=True)
+        self.digest = hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+    def get(self, url):
+        return self.images.get(url.split("?", 1)[0].split("#", 1)[0])
+
+
+def build_image_map(dir_path_static, dir_path_cache, file_hash, workers=1):
+    # Reads every image's size and, when Pillow is installed, makes
+    # downscaled variants. Variants are cached by source hash, so an
+    # unchanged image is never processed twice.
+    stats = buildstats.active
+    with stats.phase("images"):
+        files = []
+        for dir_path, dir_names, filenames in os.walk(dir_path_static):
+            dir_names.sort()
+            for filename in sorted(filenames):
+                if filename.lower().endswith(image_extensions):
+                    from_path = os.path.join(dir_path, filename)
+                    relative_path = os.path.relpath(from_path, dir_path_static)
+                    files.append((from_path, "/" + relative_path.replace(os.sep, "/")))
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            hashes = list(executor.map(file_hash, [from_path for from_path, _ in files]))
+            sizes = list(executor.map(image_size, [from_path for from_path, _ in files]))
+
+            image_map = ImageMap()
+            pending = []
+            for (from_path, site_path), digest, size in zip(files, hashes, sizes):
+                if size is None:
+                    continue
+                width, height = size
+                variants = []
+                if Image is not None and site_path.lower().endswith(resizable_extensions):
+                    extension = posixpath.splitext(site_path)[1]
+                    for variant_width in variant_widths:
+                        if variant_width >= width:
+                            break
+                        cache_path = os.path.join(
+                            dir_path_cache, f"{digest[:20]}-{variant_width}{extension}"
+                        )
+                        if not os.path.exists(cache_path):
+                            pending.append((from_path, cache_path, variant_width))
+                        variants.append(
+                            (cache_path, variant_path(site_path, variant_width), variant_width)
+                        )
+                image_map.add(site_path, width, height, variants)
+
+            if pending:
+                os.makedirs(dir_path_cache, exist_ok=True)
+            # Pillow releases the GIL while resizing and encoding.
+            list(executor.map(lambda task: make_variant(*task), pending))
+        image_map.finish()
+    stats.count("images", len(image_map.images))
+    stats.count("image variants made", len(pending))
+    return image_map
+
+
+def variant_path(site_path, width):
+    stem, extension = posixpath.splitext(site_path)
+    return f"{stem}.{width}w{extension}"
+
+
+def make_variant(from_path, cache_path, width):
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with Image.open(from_path) as image:
+            height = max(1, round(image.height * width / image.width))
+            image.resize((width, height), Image.LANCZOS).save(tmp_path, format=image.format)
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def image_size(path):
+    # Reads (width, height) from the file header so sizes are known even
+    # without Pillow; None for formats or files it does not understand.
+    with open(path, "rb") as image_file:
+        header = image_file.read(30)
+        if header.startswith(b"RIFF") and header[8:12] == b"WEBP":
+            return webp_size(header)
+        if header.startswith(b"\x89PNG\r\n\x1a\n") and header[12:16] == b"IHDR":
+            return struct.unpack(">II", header[16:24])
+        if header[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", header[6:10])
+        if header.startswith(b"\xff\xd8"):
+            image_file.seek(2)
+            return jpeg_size(image_file)
+    return None
+
+
+def webp_size(header):
+    # The first chunk is lossy (VP8), lossless (VP8L) or extended (VP8X),
+    # and each stores the size its own way.
+    if len(header) < 30:
+        return None
+    chunk, data = header[12:16], header[20:30]
+    if chunk == b"VP8 " and data[3:6] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", data[6:10])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and data[0] == 0x2F:
+        bits = struct.unpack("<I", data[1:5])[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        width = int.from_bytes(data[4:7], "little") + 1
+        height = int.from_bytes(data[7:10], "little") + 1
+        return width, height
+    return None
+
+
+def jpeg_size(image_file):
+    while True:
+        marker = image_file.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        if marker[1] in (0xD8, 0x01) or 0xD0 <= marker[1] <= 0xD7:
+            continue
+        length = image_file.read(2)
+        if len(length) < 2:
+            return None
+        # Start-of-frame markers carry the size; C4, C8 and CC do not.
+        if 0xC0 <= marker[1] <= 0xCF and marker[1] not in (0xC4, 0xC8, 0xCC):
+            frame = image_file.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            return width, height
+        image_file.seek(struct.unpack(">H", length)[0] - 2, os.SEEK_CUR)
+
+
+def activate(image_map):
+    global active
+    previous = active
+    active = image_map
+    return previous
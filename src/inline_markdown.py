@@ -1,18 +1,68 @@
 import re
 
-from textnode import TextNode, TextType
+from textnode import TextNode, TextType, text_to_html_node
+
+image_pattern = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+link_pattern = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+inline_pattern = re.compile(
+    r"\*\*(?P<bold>.*?)\*\*"
+    r"|_(?P<italic>.*?)_"
+    r"|`(?P<code>.*?)`"
+    r"|!\[(?P<image_alt>[^\[\]]*)\]\((?P<image_url>[^\(\)]*)\)"
+    r"|(?<!!)\[(?P<link_text>[^\[\]]*)\]\((?P<link_url>[^\(\)]*)\)",
+    re.DOTALL,
+)
+unclosed_delimiters = ("**", "_", "`")
 
 
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    return scan_inline(text, TextNode)
+
+
+def text_to_html_nodes(text):
+    return scan_inline(text, text_to_html_node)
+
+
+def scan_inline(text, make_node):
+    # Single left-to-right scan: each character is examined once instead of
+    # once per delimiter/image/link pass. make_node(text, text_type, url)
+    # builds each output node, so callers can skip intermediate TextNodes.
+    nodes = []
+    start = 0
+    for match in inline_pattern.finditer(text):
+        if match.start() > start:
+            nodes.append(make_node(plain_text(text[start : match.start()]), TextType.TEXT))
+        start = match.end()
+        kind = match.lastgroup
+        if kind == "bold":
+            if match.group("bold") != "":
+                nodes.append(make_node(match.group("bold"), TextType.BOLD))
+        elif kind == "italic":
+            if match.group("italic") != "":
+                nodes.append(make_node(match.group("italic"), TextType.ITALIC))
+        elif kind == "code":
+            if match.group("code") != "":
+                nodes.append(make_node(match.group("code"), TextType.CODE))
+        elif kind == "image_url":
+            nodes.append(
+                make_node(match.group("image_alt"), TextType.IMAGE, match.group("image_url"))
+            )
+        else:
+            nodes.append(
+                make_node(match.group("link_text"), TextType.LINK, match.group("link_url"))
+            )
+    if start < len(text):
+        nodes.append(make_node(plain_text(text[start:]), TextType.TEXT))
     return nodes
 
 
+def plain_text(text):
+    for delimiter in unclosed_delimiters:
+        if delimiter in text:
+            raise ValueError("invalid markdown, formatted section not closed")
+    return text
+
+
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
     for old_node in old_nodes:
@@ -35,66 +85,44 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
 
 
 def split_nodes_image(old_nodes):
-    new_nodes = []
-    for old_node in old_nodes:
-        if old_node.text_type != TextType.TEXT:
-            new_nodes.append(old_node)
-            continue
-        original_text = old_node.text
-        images = extract_markdown_images(original_text)
-        if len(images) == 0:
-            new_nodes.append(old_node)
-            continue
-        for image in images:
-            sections = original_text.split(f"![{image[0]}]({image[1]})", 1)
-            if len(sections) != 2:
-                raise ValueError("invalid markdown, image section not closed")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(
-                TextNode(
-                    image[0],
-                    TextType.IMAGE,
-                    image[1],
-                )
-            )
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
-    return new_nodes
+    return split_nodes_pattern(
+        old_nodes,
+        image_pattern,
+        lambda match: TextNode(match.group(1), TextType.IMAGE, match.group(2)),
+    )
 
 
 def split_nodes_link(old_nodes):
+    return split_nodes_pattern(
+        old_nodes,
+        link_pattern,
+        lambda match: TextNode(match.group(1), TextType.LINK, match.group(2)),
+    )
+
+
+def split_nodes_pattern(old_nodes, pattern, make_node):
     new_nodes = []
     for old_node in old_nodes:
         if old_node.text_type != TextType.TEXT:
             new_nodes.append(old_node)
             continue
         original_text = old_node.text
-        links = extract_markdown_links(original_text)
-        if len(links) == 0:
+        start = 0
+        for match in pattern.finditer(original_text):
+            if match.start() > start:
+                new_nodes.append(TextNode(original_text[start : match.start()], TextType.TEXT))
+            new_nodes.append(make_node(match))
+            start = match.end()
+        if start == 0:
             new_nodes.append(old_node)
-            continue
-        for link in links:
-            sections = original_text.split(f"[{link[0]}]({link[1]})", 1)
-            if len(sections) != 2:
-                raise ValueError("invalid markdown, link section not closed")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(TextNode(link[0], TextType.LINK, link[1]))
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
+        elif start < len(original_text):
+            new_nodes.append(TextNode(original_text[start:], TextType.TEXT))
     return new_nodes
 
 
 def extract_markdown_images(text):
-    pattern = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return image_pattern.findall(text)
 
 
 def extract_markdown_links(text):
-    pattern = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return link_pattern.findall(text)
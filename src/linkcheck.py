@@ -0,0 +1,66 @@
+import os
+
+import assets
+import buildstats
+from dependencies import page_url, site_path
+
+
+class OutputIndex:
+    # Site paths of every file in the build output, so each reference is
+    # checked with a few set lookups instead of touching the filesystem.
+    def __init__(self, dest_paths, dest_dir_path):
+        # Manifest keys are normalized, so slicing the output directory off
+        # gives their URL without a relpath per output.
+        prefix = os.path.join(os.path.normpath(dest_dir_path), "")
+        self.paths = set()
+        for dest_path in map(str, dest_paths):
+            if dest_path.startswith(prefix) and ".." not in dest_path:
+                self.paths.add("/" + dest_path[len(prefix) :].replace(os.sep, "/"))
+            else:
+                self.paths.add(page_url(dest_path, dest_dir_path))
+
+    def __contains__(self, path):
+        if path.endswith("/"):
+            return path + "index.html" in self.paths
+        return (
+            path in self.paths
+            or path + ".html" in self.paths
+            or path + "/index.html" in self.paths
+        )
+
+
+def check_links(outputs, dest_dir_path, dest_paths=None):
+    # Validates the references recorded for each page while it rendered, so
+    # the generated HTML is never read back. dest_paths limits the check to
+    # some of the pages, against every output.
+    stats = buildstats.active
+    with stats.phase("link check"):
+        index = OutputIndex(outputs, dest_dir_path)
+        broken = []
+        checked = 0
+        if dest_paths is None:
+            dest_paths = outputs
+        for dest_path in dest_paths:
+            entry = outputs[dest_path]
+            references = entry.get("references")
+            if references is None:
+                continue
+            from_url = page_url(dest_path, dest_dir_path)
+            for kind, label in (("images", "image"), ("links", "link")):
+                for url, line_number in references[kind]:
+                    path = site_path(url, from_url)
+                    if path is None:
+                        continue
+                    if assets.active is not None:
+                        path = assets.active.url(path)
+                    checked += 1
+                    if path not in index:
+                        broken.append((entry["source"], line_number, label, url))
+    stats.count("links checked", checked)
+    stats.count("broken links", len(broken))
+    return sorted(broken)
+
+
+def format_broken_link(broken_link):
+    source, line_number, label, url = broken_link
+    return f"{source}:{line_number}: broken {label} {url}"
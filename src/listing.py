@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+
+import buildstats
+from dependencies import page_url
+from gencontent import make_parent_dirs, write_template_page
+from htmlnode import LeafNode, ParentNode
+from template import load_template, rewrite_root_url, url_context
+
+
+def section_pages(page_index, section_dir_path):
+    # Published pages below a section directory, newest first; undated pages
+    # follow the dated ones, and ties are broken by title.
+    prefix = os.path.join(section_dir_path, "")
+    pages = [page for page in page_index.pages if page.from_path.startswith(prefix)]
+    pages.sort(key=lambda page: page.title or "")
+    pages.sort(key=lambda page: str(page.metadata.get("date") or ""), reverse=True)
+    return pages
+
+
+def listing_path(section_url, number):
+    if number == 1:
+        return section_url
+    return f"{section_url}page/{number}/"
+
+
+def listing_entry(page, dest_dir_path):
+    url = page_url(page.dest_path, dest_dir_path)
+    if url.endswith("/index.html"):
+        url = url[: -len("index.html")]
+    date = page.metadata.get("date")
+    return [url, page.title or url, str(date) if date is not None else None]
+
+
+def listing_node(title, entries, section_url, number, page_count, basepath):
+    items = []
+    for url, entry_title, date in entries:
+        children = [LeafNode("a", entry_title, {"href": rewrite_root_url(url, basepath)})]
+        if date is not None:
+            children.append(LeafNode(None, " "))
+            children.append(LeafNode("time", date, {"datetime": date}))
+        items.append(ParentNode("li", children))
+    children = [LeafNode("h1", title), ParentNode("ul", items)]
+    links = []
+    if number > 1:
+        url = rewrite_root_url(listing_path(section_url, number - 1), basepath)
+        links.append(LeafNode("a", "Newer posts", {"href": url, "rel": "prev"}))
+    if number < page_count:
+        url = rewrite_root_url(listing_path(section_url, number + 1), basepath)
+        links.append(LeafNode("a", "Older posts", {"href": url, "rel": "next"}))
+    if links:
+        children.append(ParentNode("nav", links))
+    return ParentNode("div", children)
+
+
+def is_current(manifest, dest_path, template_path, key):
+    previous = manifest.previous(dest_path)
+    if previous is None or previous.get("listing") != key or not os.path.exists(dest_path):
+        return False
+    entry = manifest.entry([template_path])
+    return (
+        previous["inputs"].get(template_path) == entry["inputs"][template_path]
+        and previous["basepath"] == entry["basepath"]
+        and previous["version"] == entry["version"]
+        and previous.get("options", []) == manifest.options
+    )
+
+
+def generate_listings(
+    page_index,
+    sections,
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    basepath,
+    manifest,
+    per_page=10,
+):
+    # Writes an index.html per section page, built from the page index. Each
+    # listing page is keyed by the entries it shows, so when one post
+    # changes only the pages whose entries moved or changed are rewritten.
+    stats = buildstats.active
+    written = 0
+    with stats.phase("listings"):
+        for section in sections:
+            section_dir_path = os.path.join(dir_path_content, section)
+            if not os.path.isdir(section_dir_path):
+                raise ValueError(f"no section directory: {section_dir_path}")
+            if os.path.exists(os.path.join(section_dir_path, "index.md")):
+                raise ValueError(f"{section_dir_path}/index.md conflicts with its section listing")
+            section_url = "/" + section.strip("/") + "/"
+            section_title = os.path.basename(section.strip("/")).replace("-", " ").title()
+
+            pages = section_pages(page_index, section_dir_path)
+            entries = [listing_entry(page, dest_dir_path) for page in pages]
+            page_count = max(1, (len(entries) + per_page - 1) // per_page)
+            for number in range(1, page_count + 1):
+                page_entries = entries[(number - 1) * per_page : number * per_page]
+                # The posts shown are inputs too, so --affected lists the
+                # listing pages a post appears on.
+                inputs = [template_path] + [
+                    page.from_path for page in pages[(number - 1) * per_page : number * per_page]
+                ]
+                title = section_title if number == 1 else f"{section_title} (page {number})"
+                dest_path = os.path.join(
+                    dest_dir_path, listing_path(section_url, number).lstrip("/"), "index.html"
+                )
+                data = json.dumps([title, page_entries, number, page_count, url_context(basepath)])
+                key = hashlib.sha1(data.encode("utf-8")).hexdigest()
+                if is_current(manifest, dest_path, template_path, key):
+                    # A post edit that leaves its entry alone only refreshes
+                    # the recorded hashes.
+                    manifest.record(dest_path, inputs, {"listing": key})
+                    continue
+
+                node = listing_node(title, page_entries, section_url, number, page_count, basepath)
+                values = {"Title": title, "Content": node}
+                template = load_template(template_path)
+                print(f" * {section_dir_path} {template_path} -> {dest_path}")
+                make_parent_dirs(dest_path)
+                write_template_page(dest_path, template, values, basepath)
+                manifest.record(dest_path, inputs, {"listing": key})
+                written += 1
+    stats.count("listing pages written", written)
+    return written
@@ -1,28 +1,473 @@
+import argparse
 import os
 import shutil
-import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from copystatic import copy_files_recursive
-from gencontent import generate_pages_recursive
+import assets
+import buildstats
+import highlight
+import images
+import minify
+import parsecache
+import precompress
+import rendercache
+import search
+from copystatic import copy_files_recursive, sync_modes
+from devserver import serve_and_watch
+from gencontent import generate_pages, generate_pages_recursive
+from linkcheck import check_links, format_broken_link
+from listing import generate_listings
+from manifest import Manifest, output_key
 
 dir_path_static = "./static"
 dir_path_docs = "./docs"
 dir_path_content = "./content"
 template_path = "./template.html"
+manifest_path = "./.cache/manifest.json"
+render_cache_path = "./.cache/render-cache.json"
+highlight_cache_path = "./.cache/highlight.json"
+parse_cache_path = "./.cache/pages"
+image_cache_path = "./.cache/images"
+minify_cache_path = "./.cache/minify"
+asset_cache_path = "./.cache/assets"
+asset_manifest_path = "./docs/asset-manifest.json"
+search_index_path = "./docs/search"
+parse_cache_max_age_days = 30
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build the static site into docs/.")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "--clean",
+        action="store_true",
+        help="delete docs/ and rebuild everything instead of only changed files",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of worker processes used to render pages (default: CPU count)",
+    )
+    parser.add_argument(
+        "--static-mode",
+        choices=sync_modes,
+        default="copy",
+        help="how changed static files are placed in docs/; hardlink shares inodes with static/",
+    )
+    parser.add_argument(
+        "--static-workers",
+        type=int,
+        default=8,
+        help="maximum number of static files copied concurrently (default: 8)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="serve docs/ with live reload and rebuild changed files on save",
+    )
+    parser.add_argument(
+        "--no-parse-cache",
+        dest="parse_cache",
+        action="store_false",
+        help="always re-render markdown instead of reusing article HTML cached in .cache/pages",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="give CSS, JS, images and fonts content-hashed names and rewrite references to them",
+    )
+    parser.add_argument(
+        "--images",
+        action="store_true",
+        help="add sizes, lazy loading and (with Pillow installed) downscaled srcset variants to images",
+    )
+    parser.add_argument(
+        "--highlight",
+        action="store_true",
+        help="highlight fenced code by its language (python, shell, json, html, css) at build time",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="minify pages as they are written and CSS files as they are copied",
+    )
+    parser.add_argument(
+        "--section",
+        dest="sections",
+        action="append",
+        default=[],
+        metavar="DIR",
+        help="generate paginated listing pages for content/DIR (e.g. blog); may be repeated",
+    )
+    parser.add_argument(
+        "--per-page",
+        type=int,
+        default=10,
+        help="number of pages listed per section listing page (default: 10)",
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help="write a prefix-sharded full-text search index to docs/search/",
+    )
+    parser.add_argument(
+        "--precompress",
+        action="append",
+        choices=precompress.encodings,
+        help="also write .gz (gzip) or .br (brotli) siblings of text outputs; may be repeated",
+    )
+    parser.add_argument(
+        "--precompress-min-size",
+        type=int,
+        default=1024,
+        help="smallest output in bytes that gets precompressed siblings (default: 1024)",
+    )
+    parser.add_argument(
+        "--render-cache",
+        action="store_true",
+        help="reuse the rendered HTML of identical blocks across pages and builds",
+    )
+    parser.add_argument(
+        "--render-cache-size",
+        type=int,
+        default=10000,
+        help="maximum number of blocks kept in the render cache (default: 10000)",
+    )
+    parser.add_argument(
+        "--stats",
+        "--profile",
+        action="store_true",
+        help="print per-phase wall/CPU times, counters and the slowest pages",
+    )
+    parser.add_argument("--stats-json", metavar="PATH", help="also write the build stats as JSON")
+    parser.add_argument(
+        "--slowest", type=int, default=10, help="number of slowest pages to report (default: 10)"
+    )
+    parser.add_argument(
+        "--strict-links",
+        action="store_true",
+        help="fail the build when a page has a broken internal link or image",
+    )
+    parser.add_argument(
+        "--affected",
+        metavar="PATH",
+        help="list the outputs the last build would rebuild if PATH changed, then exit",
+    )
+    parser.add_argument("--port", type=int, default=8888, help="port for --watch (default: 8888)")
+    args = parser.parse_args()
+    if args.per_page < 1:
+        parser.error("--per-page must be at least 1")
+    if args.precompress and "brotli" in args.precompress and precompress.brotli is None:
+        parser.error("--precompress brotli needs the brotli package")
+    return args
+
+
+def build(args, basepath, clean):
+    stats = buildstats.BuildStats() if args.stats or args.stats_json else buildstats.null_stats
+    buildstats.activate(stats)
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    cache = None
+    if args.render_cache:
+        cache = rendercache.RenderCache(args.render_cache_size)
+        cache.load(render_cache_path)
+    rendercache.activate(cache)
+    highlighter = None
+    if args.highlight:
+        highlighter = highlight.Highlighter()
+        highlighter.cache.load(highlight_cache_path)
+    highlight.activate(highlighter)
+    parsecache.activate(parsecache.ParseCache(parse_cache_path) if args.parse_cache else None)
+    precompressor = None
+    if args.precompress:
+        precompressor = precompress.Precompressor(args.precompress, args.precompress_min_size)
+    precompress.activate(precompressor)
+    search.activate(search.SearchIndex() if args.search else None)
+    minifier = minify.Minifier(minify_cache_path) if args.minify else None
+    minify.activate(minifier)
+
+    options = [
+        name
+        for name in ("fingerprint", "highlight", "images", "minify", "search")
+        if getattr(args, name)
+    ]
+    manifest = Manifest(manifest_path, basepath, options)
+    if clean or not manifest.entries:
+        print("Deleting docs directory...")
+        with stats.phase("delete"):
+            if os.path.exists(dir_path_docs):
+                shutil.rmtree(dir_path_docs)
+        manifest.clear()
+
+    # Pages embed image sizes, variants and fingerprinted names, so images
+    # are processed and every asset hashed (cached by size and mtime) before
+    # anything is copied or rendered.
+    image_map = None
+    if args.images:
+        image_map = images.build_image_map(
+            dir_path_static, image_cache_path, manifest.file_hash, args.static_workers
+        )
+    images.activate(image_map)
+    variants = image_map.variants if image_map is not None else []
+
+    asset_map = None
+    if args.fingerprint:
+        asset_map = assets.build_asset_map(
+            dir_path_static, manifest.file_hash, args.static_workers, variants, asset_cache_path
+        )
+    assets.activate(asset_map)
+
+    variant_files = []
+    for cache_path, site_path in variants:
+        if asset_map is not None:
+            site_path = asset_map.url(site_path)
+        variant_files.append((cache_path, os.path.join(dir_path_docs, site_path.lstrip("/"))))
+
+    # Static files are copied on a background thread while pages render.
+    with ThreadPoolExecutor(max_workers=1) as static_executor:
+        print("Copying static files to docs directory...")
+        static_copy = static_executor.submit(
+            copy_files_recursive,
+            dir_path_static,
+            dir_path_docs,
+            manifest,
+            args.static_mode,
+            args.static_workers,
+            variant_files,
+        )
+
+        print("Generating content...")
+        page_index = generate_pages_recursive(
+            dir_path_content,
+            template_path,
+            dir_path_docs,
+            basepath,
+            manifest,
+            args.jobs,
+            dir_path_static,
+        )
+        static_copy.result()
+
+    if args.sections:
+        generate_listings(
+            page_index,
+            args.sections,
+            dir_path_content,
+            template_path,
+            dir_path_docs,
+            basepath,
+            manifest,
+            args.per_page,
+        )
+
+    if asset_map is not None:
+        asset_map.save(asset_manifest_path)
+        manifest.record(asset_manifest_path, [])
+
+    if args.search:
+        with stats.phase("search index"):
+            search.active.add_outputs(manifest.outputs, dir_path_docs, basepath)
+            for index_path in search.active.write(search_index_path):
+                manifest.record(index_path, [])
+
+    if precompressor is not None:
+        siblings = precompress.precompress_outputs(
+            precompressor, list(manifest.outputs), args.static_workers
+        )
+        for sibling_path in siblings:
+            manifest.record(sibling_path, [])
+
+    manifest.prune(dir_path_docs)
+    manifest.save()
+
+    broken_links = check_links(manifest.outputs, dir_path_docs)
+    if broken_links:
+        print("Broken links:")
+        for broken_link in broken_links:
+            print(f" * {format_broken_link(broken_link)}")
+    if cache is not None:
+        print(f"Render cache: {cache.summary()}")
+        cache.save(render_cache_path)
+    if highlighter is not None:
+        print(f"Highlight cache: {highlighter.cache.summary()}")
+        highlighter.cache.save(highlight_cache_path)
+    if minifier is not None:
+        print(f"Minify: {minifier.summary()}")
+    if args.parse_cache:
+        # Entries are touched on every hit, so this only drops articles
+        # that no build has needed for a while.
+        parsecache.active.prune(parse_cache_max_age_days)
+
+    if stats.enabled:
+        stats.add_phase("total", time.perf_counter() - start, time.process_time() - cpu_start)
+        print(stats.report(args.slowest))
+        if args.stats_json:
+            stats.write_json(args.stats_json, args.slowest)
+
+    if broken_links and args.strict_links:
+        raise ValueError(f"{len(broken_links)} broken link(s)")
+    return manifest, page_index
+
+
+def rebuild_pages(args, basepath, manifest, page_index, changed):
+    # A --watch rebuild for edits to existing pages, run against the
+    # manifest and page index kept from the last build: only the edited
+    # pages and their sections' listings are rewritten, and only their
+    # links are checked. Returns False when the change needs a full build.
+    content_prefix = os.path.join(dir_path_content, "")
+    if not all(path.startswith(content_prefix) and os.path.isfile(path) for path in changed):
+        return False
+    page_infos = []
+    for from_path in changed:
+        page = page_index.update(from_path)
+        if page is None:
+            return False
+        if not page.draft:
+            page_infos.append(page)
+
+    stats = buildstats.BuildStats() if args.stats or args.stats_json else buildstats.null_stats
+    buildstats.activate(stats)
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    print("Generating content...")
+    generate_pages(
+        page_infos,
+        dir_path_content,
+        template_path,
+        dir_path_docs,
+        basepath,
+        manifest,
+        1,
+        dir_path_static,
+    )
+    dest_paths = [output_key(page.dest_path) for page in page_infos]
+
+    sections = [
+        section
+        for section in args.sections
+        if any(path.startswith(os.path.join(dir_path_content, section, "")) for path in changed)
+    ]
+    listing_paths = []
+    if sections:
+        generate_listings(
+            page_index,
+            sections,
+            dir_path_content,
+            template_path,
+            dir_path_docs,
+            basepath,
+            manifest,
+            args.per_page,
+        )
+        listing_prefixes = tuple(
+            os.path.join(output_key(dir_path_docs), section.strip("/"), "") for section in sections
+        )
+        listing_paths = [
+            dest_path
+            for dest_path, entry in manifest.outputs.items()
+            if "listing" in entry and dest_path.startswith(listing_prefixes)
+        ]
+
+    index_paths = []
+    if args.search:
+        with stats.phase("search index"):
+            outputs = {dest_path: manifest.outputs[dest_path] for dest_path in dest_paths}
+            search.active.add_outputs(outputs, dir_path_docs, basepath)
+            # Shards that no longer have any terms are pruned below.
+            search_prefix = os.path.join(output_key(search_index_path), "")
+            for dest_path in [path for path in manifest.outputs if path.startswith(search_prefix)]:
+                del manifest.outputs[dest_path]
+            index_paths = search.active.write(search_index_path)
+            for index_path in index_paths:
+                manifest.record(index_path, [])
+
+    if precompress.active is not None:
+        siblings = precompress.precompress_outputs(
+            precompress.active, listing_paths + index_paths, args.static_workers
+        )
+        for sibling_path in siblings:
+            manifest.record(sibling_path, [])
+
+    manifest.prune(dir_path_docs)
+    manifest.advance()
+
+    broken_links = check_links(manifest.outputs, dir_path_docs, dest_paths)
+    if broken_links:
+        print("Broken links:")
+        for broken_link in broken_links:
+            print(f" * {format_broken_link(broken_link)}")
+
+    if stats.enabled:
+        stats.add_phase("total", time.perf_counter() - start, time.process_time() - cpu_start)
+        print(stats.report(args.slowest))
+        if args.stats_json:
+            stats.write_json(args.stats_json, args.slowest)
+
+    if broken_links and args.strict_links:
+        raise ValueError(f"{len(broken_links)} broken link(s)")
+    return True
+
+
+def save_watch_state(manifest):
+    # Rebuilds during --watch keep the manifest and caches in memory; they
+    # are written before a full build and when the watch stops.
+    manifest.save()
+    if rendercache.active is not None:
+        rendercache.active.save(render_cache_path)
+    if highlight.active is not None:
+        highlight.active.cache.save(highlight_cache_path)
+
+
+def watch(args, basepath, manifest, page_index):
+    def rebuild(changed):
+        nonlocal manifest, page_index
+        if rebuild_pages(args, basepath, manifest, page_index, changed):
+            return
+        save_watch_state(manifest)
+        manifest, page_index = build(args, basepath, False)
+
+    try:
+        serve_and_watch(
+            dir_path_docs,
+            args.port,
+            [dir_path_content, dir_path_static, template_path],
+            rebuild,
+        )
+    finally:
+        save_watch_state(manifest)
+
+
+def print_affected(path, basepath):
+    rebuilt, linked_from = Manifest(manifest_path, basepath).affected(path)
+    print(f"Rebuilt if {path} changes:")
+    for dest_path in rebuilt:
+        print(f" * {dest_path}")
+    if linked_from:
+        print("Linked from:")
+        for dest_path in linked_from:
+            print(f" * {dest_path}")
+
 
 def main():
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
+    args = parse_args()
+    basepath = args.basepath
     if not basepath.endswith("/"):
         basepath += "/"
 
-    print("Deleting docs directory...")
-    if os.path.exists(dir_path_docs):
-        shutil.rmtree(dir_path_docs)
+    if args.affected:
+        print_affected(args.affected, basepath)
+        return
 
-    print("Copying static files to docs directory...")
-    copy_files_recursive(dir_path_static, dir_path_docs)
+    manifest, page_index = build(args, basepath, args.clean)
+
+    if args.watch:
+        watch(args, basepath, manifest, page_index)
 
-    print("Generating content...")
-    generate_pages_recursive(dir_path_content, template_path, dir_path_docs, basepath)
 
-main()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import threading
+
+GENERATOR_VERSION = "3"
+
+
+class Manifest:
+    def __init__(self, path, basepath, options=()):
+        # options names the build settings that change every output, such
+        # as fingerprinted asset names.
+        self.path = path
+        self.basepath = basepath
+        self.options = sorted(options)
+        self.entries = {}
+        self.hashes = {}
+        self.hashes_changed = False
+        self.unsaved = False
+        self.outputs = {}
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r") as manifest_file:
+            data = json.load(manifest_file)
+        if data.get("version") != GENERATOR_VERSION:
+            return
+        self.entries = {output_key(path): entry for path, entry in data["outputs"].items()}
+        self.hashes = data["hashes"]
+
+    def save(self):
+        # A build that changed nothing leaves the file alone; otherwise it is
+        # written compactly, since the indenting encoder is pure Python and
+        # per-page details make the manifest large.
+        if self.outputs == self.entries and not self.hashes_changed and not self.unsaved:
+            return
+        dir_path = os.path.dirname(self.path)
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        used_paths = set()
+        for entry in self.outputs.values():
+            used_paths.update(entry["inputs"])
+        data = {
+            "version": GENERATOR_VERSION,
+            "outputs": self.outputs,
+            "hashes": {path: self.hashes[path] for path in used_paths if path in self.hashes},
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as manifest_file:
+            manifest_file.write(json.dumps(data, separators=(",", ":")))
+        os.replace(tmp_path, self.path)
+        self.entries = dict(self.outputs)
+        self.hashes_changed = False
+        self.unsaved = False
+
+    def advance(self):
+        # Makes this build's outputs what the next build compares against
+        # without writing the file, for rebuilds kept in memory by --watch.
+        if self.outputs != self.entries:
+            self.entries = dict(self.outputs)
+            self.unsaved = True
+
+    def clear(self):
+        self.entries = {}
+
+    def file_hash(self, path):
+        stat = os.stat(path)
+        cached = self.hashes.get(path)
+        if cached is not None and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        file_hash = digest.hexdigest()
+        with self.lock:
+            self.hashes[path] = [stat.st_size, stat.st_mtime_ns, file_hash]
+            self.hashes_changed = True
+        return file_hash
+
+    def entry(self, source_paths):
+        inputs = {}
+        for path in source_paths:
+            try:
+                inputs[path] = self.file_hash(path)
+            except FileNotFoundError:
+                inputs[path] = None
+        entry = {"inputs": inputs, "basepath": self.basepath, "version": GENERATOR_VERSION}
+        if self.options:
+            entry["options"] = self.options
+        return entry
+
+    def previous(self, dest_path):
+        return self.entries.get(output_key(dest_path))
+
+    def dependencies(self, dest_path):
+        previous = self.previous(dest_path)
+        return list(previous["inputs"]) if previous is not None else []
+
+    def unchanged_detail(self, dest_path, source_path, key):
+        # A detail recorded last time for an output, provided the source it
+        # was derived from has not changed since.
+        previous = self.previous(dest_path)
+        if previous is None or key not in previous:
+            return None
+        try:
+            if previous["inputs"].get(source_path) != self.file_hash(source_path):
+                return None
+        except FileNotFoundError:
+            return None
+        return previous[key]
+
+    def up_to_date(self, dest_path, source_paths):
+        dest_path = output_key(dest_path)
+        previous = self.entries.get(dest_path)
+        if previous is None or not os.path.exists(dest_path):
+            return False
+        entry = self.entry(source_paths)
+        if any(previous.get(key) != value for key, value in entry.items()):
+            return False
+        if previous.get("options", []) != self.options:
+            return False
+        with self.lock:
+            self.outputs[dest_path] = previous
+        return True
+
+    def record(self, dest_path, source_paths, details=None):
+        # details holds whatever else the build wants to remember about an
+        # output, such as a page's references; it is not part of the check.
+        entry = self.entry(source_paths)
+        if details is not None:
+            entry.update(details)
+        with self.lock:
+            self.outputs[output_key(dest_path)] = entry
+
+    def affected(self, path):
+        # Outputs rebuilt when the file at path changes, and the outputs
+        # of pages that link to it.
+        path = os.path.normpath(path)
+        rebuilt = []
+        linked_from = []
+        for dest_path, entry in sorted(self.entries.items()):
+            if any(os.path.normpath(input_path) == path for input_path in entry["inputs"]):
+                rebuilt.append(dest_path)
+            if any(os.path.normpath(link) == path for link in entry.get("linked_pages", [])):
+                linked_from.append(dest_path)
+        return rebuilt, linked_from
+
+    def prune(self, dest_root):
+        for dest_path in self.entries:
+            if dest_path in self.outputs or not os.path.exists(dest_path):
+                continue
+            print(f" * removing stale {dest_path}")
+            os.remove(dest_path)
+            remove_empty_dirs(os.path.dirname(dest_path), dest_root)
+
+
+def output_key(dest_path):
+    # Outputs are joined onto "./docs" in some places and reached through
+    # Path, which drops the "./", in others; each gets exactly one key.
+    return os.path.normpath(dest_path)
+
+
+def remove_empty_dirs(dir_path, root_path):
+    root_path = os.path.normpath(root_path)
+    dir_path = os.path.normpath(dir_path)
+    while dir_path != root_path and dir_path.startswith(root_path + os.sep):
+        if os.listdir(dir_path):
+            return
+        os.rmdir(dir_path)
+        dir_path = os.path.dirname(dir_path)
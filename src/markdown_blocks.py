@@ -1,8 +1,10 @@
 from enum import Enum
 
-from htmlnode import ParentNode
-from inline_markdown import text_to_textnodes
-from textnode import text_node_to_html_node, TextNode, TextType
+import buildstats
+import highlight
+from htmlnode import LeafNode, ParentNode
+from inline_markdown import text_to_html_nodes
+from textnode import text_to_html_node, TextType
 
 
 class BlockType(Enum):
@@ -15,34 +17,71 @@ class BlockType(Enum):
 
 
 def markdown_to_blocks(markdown):
-    blocks = markdown.split("\n\n")
-    filtered_blocks = []
-    for block in blocks:
-        if block == "":
+    return [block for block, _ in iter_blocks(markdown.split("\n"))]
+
+
+def iter_blocks(lines):
+    # Accepts any iterable of lines (a list or an open file) and yields
+    # (block, block_type) pairs one at a time. Fenced code runs to its
+    # closing fence, so blank lines inside it do not split the block.
+    block_lines = []
+    in_fence = False
+    for line in lines:
+        line = line.rstrip("\n")
+        if in_fence:
+            block_lines.append(line)
+            if line.startswith("```"):
+                in_fence = False
+                yield from finish_block(block_lines)
+                block_lines = []
+            continue
+        if line == "":
+            yield from finish_block(block_lines)
+            block_lines = []
             continue
-        block = block.strip()
-        filtered_blocks.append(block)
-    return filtered_blocks
+        if not block_lines and line.startswith("```") and "```" not in line[3:]:
+            in_fence = True
+        block_lines.append(line)
+    yield from finish_block(block_lines)
+
+
+def finish_block(lines):
+    # Same result as str.strip() on the joined block, without re-splitting it.
+    start = 0
+    end = len(lines)
+    while start < end and lines[start].strip() == "":
+        start += 1
+    while end > start and lines[end - 1].strip() == "":
+        end -= 1
+    if start == end:
+        return
+    lines = lines[start:end]
+    lines[0] = lines[0].lstrip()
+    lines[-1] = lines[-1].rstrip()
+    yield "\n".join(lines), block_type_from_lines(lines)
 
 
 def block_to_block_type(block):
-    lines = block.split("\n")
+    return block_type_from_lines(block.split("\n"))
+
 
-    if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
+def block_type_from_lines(lines):
+    first = lines[0]
+    if first.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
         return BlockType.HEADING
-    if len(lines) > 1 and lines[0].startswith("```") and lines[-1].startswith("```"):
+    if len(lines) > 1 and first.startswith("```") and lines[-1].startswith("```"):
         return BlockType.CODE
-    if block.startswith(">"):
+    if first.startswith(">"):
         for line in lines:
             if not line.startswith(">"):
                 return BlockType.PARAGRAPH
         return BlockType.QUOTE
-    if block.startswith("- "):
+    if first.startswith("- "):
         for line in lines:
             if not line.startswith("- "):
                 return BlockType.PARAGRAPH
         return BlockType.ULIST
-    if block.startswith("1. "):
+    if first.startswith("1. "):
         i = 1
         for line in lines:
             if not line.startswith(f"{i}. "):
@@ -53,16 +92,19 @@ def block_to_block_type(block):
 
 
 def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
+    stats = buildstats.active
+    with stats.phase("parse blocks"):
+        blocks = list(iter_blocks(markdown.split("\n")))
     children = []
-    for block in blocks:
-        html_node = block_to_html_node(block)
+    for block, block_type in blocks:
+        html_node = block_to_html_node(block, block_type)
         children.append(html_node)
     return ParentNode("div", children, None)
 
 
-def block_to_html_node(block):
-    block_type = block_to_block_type(block)
+def block_to_html_node(block, block_type=None):
+    if block_type is None:
+        block_type = block_to_block_type(block)
     if block_type == BlockType.PARAGRAPH:
         return paragraph_to_html_node(block)
     if block_type == BlockType.HEADING:
@@ -79,12 +121,8 @@ def block_to_html_node(block):
 
 
 def text_to_children(text):
-    text_nodes = text_to_textnodes(text)
-    children = []
-    for text_node in text_nodes:
-        html_node = text_node_to_html_node(text_node)
-        children.append(html_node)
-    return children
+    with buildstats.active.phase("inline parse"):
+        return text_to_html_nodes(text)
 
 
 def paragraph_to_html_node(block):
@@ -111,10 +149,23 @@ def heading_to_html_node(block):
 def code_to_html_node(block):
     if not block.startswith("```") or not block.endswith("```"):
         raise ValueError("invalid code block")
-    text = block[4:-3]
-    raw_text_node = TextNode(text, TextType.TEXT)
-    child = text_node_to_html_node(raw_text_node)
-    code = ParentNode("code", [child])
+    first_line, newline, rest = block[3:-3].partition("\n")
+    if newline == "":
+        # A fence on one line has no info string.
+        language, text = "", first_line
+    else:
+        language, text = first_line.strip().lower(), rest
+    props = None
+    if language != "":
+        language = language.split()[0]
+        props = {"class": f"language-{language}"}
+    highlighter = highlight.active
+    html_code = highlighter.highlight(language, text) if highlighter is not None else None
+    if html_code is not None:
+        child = LeafNode(None, html_code)
+    else:
+        child = text_to_html_node(text, TextType.TEXT)
+    code = ParentNode("code", [child], props)
     return ParentNode("pre", [code])
 
 
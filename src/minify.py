@@ -0,0 +1,196 @@
+import hashlib
+import os
+import re
+import threading
+
+import buildstats
+from buildstats import format_bytes
+
+# Elements whose text is rendered (or run) verbatim.
+preserved_tags = ("pre", "code", "textarea", "script", "style")
+preserved_pattern = re.compile(r"<(%s)\b" % "|".join(preserved_tags), re.IGNORECASE)
+closing_patterns = {
+    tag: re.compile(r"</%s\s*>" % tag, re.IGNORECASE) for tag in preserved_tags
+}
+# Whitespace next to these is never rendered, so it can go entirely; "!"
+# stands for doctypes and comments.
+block_tags = frozenset(
+    "! address article aside blockquote body dd div dl dt figcaption figure footer form "
+    "h1 h2 h3 h4 h5 h6 head header hr html li link main meta nav ol p pre script section "
+    "style table tbody td tfoot th thead title tr ul".split()
+)
+tag_name_pattern = re.compile(r"</?([a-zA-Z][a-zA-Z0-9]*)")
+whitespace_pattern = re.compile(r"[ \t\r\n\f]+")
+css_token_pattern = re.compile(
+    r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|/\*.*?\*/|[^"\'/]+|.', re.DOTALL
+)
+css_punctuation_pattern = re.compile(r"\s*([{};,>])\s*")
+css_colon_pattern = re.compile(r":\s+")
+minifiable_static_extensions = (".css",)
+stream_chunk_size = 1 << 14
+
+active = None
+
+
+class Minifier:
+    def __init__(self, dir_path_cache):
+        self.dir_path_cache = dir_path_cache
+        self.saved = {}
+        self.lock = threading.Lock()
+
+    def count_saved(self, file_type, amount):
+        with self.lock:
+            self.saved[file_type] = self.saved.get(file_type, 0) + amount
+        buildstats.active.count(f"bytes saved ({file_type})", amount)
+
+    def drain(self):
+        # Hands the savings tallied in a worker process to the parent.
+        with self.lock:
+            saved, self.saved = self.saved, {}
+        return saved
+
+    def merge(self, saved):
+        with self.lock:
+            for file_type, amount in saved.items():
+                self.saved[file_type] = self.saved.get(file_type, 0) + amount
+
+    def summary(self):
+        if not self.saved:
+            return "nothing saved"
+        return ", ".join(
+            f"{format_bytes(amount)} saved on {file_type}"
+            for file_type, amount in sorted(self.saved.items())
+        )
+
+    def html(self, text):
+        output, _, _ = minify_html(text, True)
+        self.count_saved("html", len(text) - len(output))
+        return output
+
+    def stream(self, fp):
+        return HtmlStream(fp, self)
+
+    def wants(self, path):
+        return str(path).endswith(minifiable_static_extensions)
+
+    def static_file(self, from_path, file_hash=None):
+        # Returns the path of the minified copy of a static file, cached by
+        # content hash so each version is only minified once.
+        if file_hash is None:
+            with open(from_path, "rb") as from_file:
+                digest = hashlib.sha256(from_file.read()).hexdigest()
+        else:
+            digest = file_hash(from_path)
+        extension = os.path.splitext(from_path)[1]
+        cache_path = os.path.join(self.dir_path_cache, f"{digest}{extension}")
+        if not os.path.exists(cache_path):
+            with open(from_path, "r", encoding="utf-8") as from_file:
+                text = minify_css(from_file.read())
+            os.makedirs(self.dir_path_cache, exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as to_file:
+                to_file.write(text)
+            os.replace(tmp_path, cache_path)
+        return cache_path
+
+
+class HtmlStream:
+    # Wraps the file a page is streamed into and minifies what the template
+    # and nodes write, holding back only an unfinished tag or preserved
+    # element between writes.
+    def __init__(self, fp, minifier):
+        self.fp = fp
+        self.minifier = minifier
+        self.pending = ""
+        self.tag = None
+        self.saved = 0
+
+    def write(self, text):
+        self.pending += text
+        if len(self.pending) >= stream_chunk_size:
+            self.flush(False)
+
+    def flush(self, final):
+        size = len(self.pending)
+        output, self.pending, self.tag = minify_html(self.pending, final, self.tag)
+        self.saved += size - len(self.pending) - len(output)
+        self.fp.write(output)
+
+    def close(self):
+        self.flush(True)
+        self.minifier.count_saved("html", self.saved)
+
+
+def collapse_whitespace(text):
+    # Browsers render any run of whitespace as one space, so only the run's
+    # length changes; a newline is kept where the run had one.
+    return whitespace_pattern.sub(lambda m: "\n" if "\n" in m.group() else " ", text)
+
+
+def minify_html(text, final, tag=None):
+    # Returns (output, rest, last tag name): rest is the unfinished tail
+    # that must wait for more text unless final is set, and tag carries the
+    # name of the last tag written over to the next call.
+    output = []
+    position = 0
+    while True:
+        start = text.find("<", position)
+        if start == -1:
+            if final:
+                output.append(collapse_whitespace(text[position:]))
+                position = len(text)
+            break
+        name = tag_name_pattern.match(text, start)
+        name = name.group(1).lower() if name is not None else "!"
+        between = text[position:start]
+        if between.isspace() and (tag in block_tags or name in block_tags):
+            between = ""
+        match = preserved_pattern.match(text, start)
+        if match is not None:
+            closing = closing_patterns[match.group(1).lower()].search(text, match.end())
+            end = closing.end() if closing is not None else -1
+        else:
+            end = text.find(">", start)
+            end = end + 1 if end != -1 else -1
+        if end == -1:
+            if final:
+                output.append(collapse_whitespace(between))
+                output.append(text[start:])
+                position = len(text)
+            break
+        output.append(collapse_whitespace(between))
+        output.append(text[start:end])
+        position = end
+        tag = name
+    return "".join(output), text[position:], tag
+
+
+def minify_css(text):
+    # Drops comments and the whitespace CSS never needs, leaving strings
+    # alone. Space before ":" is kept, since "a :hover" and "a:hover" differ.
+    output = []
+    code = []
+    for token in css_token_pattern.findall(text):
+        if token[0] in "\"'":
+            output.append(minify_css_code("".join(code)))
+            output.append(token)
+            code = []
+        elif token.startswith("/*"):
+            code.append(" ")
+        else:
+            code.append(token)
+    output.append(minify_css_code("".join(code)))
+    return "".join(output).strip() + "\n"
+
+
+def minify_css_code(code):
+    code = whitespace_pattern.sub(" ", code)
+    code = css_punctuation_pattern.sub(r"\1", code)
+    return css_colon_pattern.sub(":", code).replace(";}", "}")
+
+
+def activate(minifier):
+    global active
+    previous = active
+    active = minifier
+    return previous
@@ -0,0 +1,73 @@
+import buildstats
+from frontmatter import split_front_matter
+
+
+class PageInfo:
+    __slots__ = ("from_path", "dest_path", "title", "metadata")
+
+    def __init__(self, from_path, dest_path, title, metadata):
+        self.from_path = from_path
+        self.dest_path = dest_path
+        self.title = title
+        self.metadata = metadata
+
+    @property
+    def draft(self):
+        return self.metadata.get("draft") is True
+
+
+class PageIndex:
+    # Titles and front matter of every published page, in discovery order,
+    # for features that list pages without reading their content.
+    def __init__(self):
+        self.pages = []
+        self.drafts = []
+
+    def add(self, page):
+        (self.drafts if page.draft else self.pages).append(page)
+
+    def update(self, from_path):
+        # Rescans a known page in place and returns it. Returns None for a
+        # new page, or one that became or stopped being a draft, since
+        # either changes the order of the index.
+        for pages in (self.pages, self.drafts):
+            for i, page in enumerate(pages):
+                if page.from_path != from_path:
+                    continue
+                try:
+                    title, metadata = scan_page(from_path)
+                except ValueError as e:
+                    raise ValueError(f"{from_path}: {e}")
+                updated = PageInfo(from_path, page.dest_path, title, metadata)
+                if updated.draft != page.draft:
+                    return None
+                pages[i] = updated
+                return updated
+        return None
+
+
+def scan_page(from_path):
+    # Reads only the front matter and, unless it sets a title, the lines up
+    # to the first heading; the body is never parsed.
+    with open(from_path, "r") as from_file:
+        metadata, lines = split_front_matter(from_file)
+        title = metadata.get("title")
+        if title is None:
+            for line in lines:
+                if line.startswith("# "):
+                    title = line[2:].rstrip("\n")
+                    break
+    return str(title) if title is not None else None, metadata
+
+
+def scan_pages(pages):
+    stats = buildstats.active
+    index = PageIndex()
+    for from_path, dest_path in pages:
+        try:
+            title, metadata = scan_page(from_path)
+        except ValueError as e:
+            raise ValueError(f"{from_path}: {e}")
+        index.add(PageInfo(from_path, dest_path, title, metadata))
+    stats.count("drafts skipped", len(index.drafts))
+    return index
@@ -0,0 +1,60 @@
+import hashlib
+import os
+import time
+
+import highlight
+import images
+from manifest import GENERATOR_VERSION
+from template import basepath_marker
+
+active = None
+
+
+class ParseCache:
+    def __init__(self, dir_path):
+        self.dir_path = dir_path
+
+    def key(self, path):
+        with open(path, "r") as source_file:
+            return self.chunks_key(iter(lambda: source_file.read(1 << 20), ""))
+
+    def text_key(self, text):
+        return self.chunks_key([text])
+
+    @staticmethod
+    def chunks_key(chunks):
+        # Sources containing the marker cannot be cached; they get no key.
+        digest = hashlib.sha256(GENERATOR_VERSION.encode("utf-8"))
+        # img tags carry image sizes and variants, but no resolved URLs.
+        if images.active is not None:
+            digest.update(images.active.digest.encode("utf-8"))
+        if highlight.active is not None:
+            digest.update(b"\0highlight")
+        for chunk in chunks:
+            if basepath_marker in chunk:
+                return None
+            digest.update(chunk.encode("utf-8"))
+        return digest.hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.dir_path, key[:2], f"{key}.html")
+
+    def prune(self, max_age_days):
+        if not os.path.exists(self.dir_path):
+            return 0
+        cutoff = time.time() - max_age_days * 86400
+        removed = 0
+        for dir_path, _, filenames in os.walk(self.dir_path):
+            for filename in filenames:
+                path = os.path.join(dir_path, filename)
+                if os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+                    removed += 1
+        return removed
+
+
+def activate(cache):
+    global active
+    previous = active
+    active = cache
+    return previous
@@ -0,0 +1,110 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import buildstats
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+encodings = ("gzip", "brotli")
+suffixes = {"gzip": ".gz", "brotli": ".br"}
+compressible_extensions = (
+    ".css",
+    ".html",
+    ".js",
+    ".json",
+    ".map",
+    ".svg",
+    ".txt",
+    ".xml",
+)
+
+active = None
+
+
+class Precompressor:
+    def __init__(self, encodings=("gzip",), min_size=1024):
+        if "brotli" in encodings and brotli is None:
+            raise ValueError("brotli precompression needs the brotli package")
+        self.encodings = tuple(encodings)
+        self.min_size = min_size
+
+    def sibling_paths(self, path):
+        return [f"{path}{suffixes[encoding]}" for encoding in self.encodings]
+
+    def wants(self, path, size):
+        return size >= self.min_size and str(path).endswith(compressible_extensions)
+
+    def write(self, path, data):
+        # Compresses an output whose bytes are already in memory, so the
+        # file is never read back.
+        if not self.wants(path, len(data)):
+            return False
+        for encoding, sibling_path in zip(self.encodings, self.sibling_paths(path)):
+            write_bytes(sibling_path, compress(data, encoding))
+        buildstats.active.count("files precompressed")
+        return True
+
+    def compress_file(self, path):
+        with open(path, "rb") as output_file:
+            return self.write(path, output_file.read())
+
+    def is_fresh(self, path):
+        mtime = os.stat(path).st_mtime_ns
+        for sibling_path in self.sibling_paths(path):
+            try:
+                if os.stat(sibling_path).st_mtime_ns < mtime:
+                    return False
+            except FileNotFoundError:
+                return False
+        return True
+
+
+def compress(data, encoding):
+    if encoding == "brotli":
+        return brotli.compress(data)
+    # A fixed mtime keeps the .gz bytes identical across rebuilds.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def write_bytes(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as to_file:
+            to_file.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def precompress_outputs(precompressor, dest_paths, workers=1):
+    # Pages and static files are compressed as they are written; this
+    # catches outputs left untouched by an incremental build whose siblings
+    # are missing or older than the output. Returns every sibling path.
+    stats = buildstats.active
+    with stats.phase("precompress"):
+        wanted = [
+            str(dest_path)
+            for dest_path in dest_paths
+            if precompressor.wants(dest_path, os.stat(dest_path).st_size)
+        ]
+        stale = [dest_path for dest_path in wanted if not precompressor.is_fresh(dest_path)]
+        if workers > 1 and len(stale) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(precompressor.compress_file, stale))
+        else:
+            for dest_path in stale:
+                precompressor.compress_file(dest_path)
+    return [sibling_path for dest_path in wanted for sibling_path in precompressor.sibling_paths(dest_path)]
+
+
+def activate(precompressor):
+    global active
+    previous = active
+    active = precompressor
+    return previous
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+from manifest import GENERATOR_VERSION
+
+active = None
+
+
+class RenderCache:
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.new_entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(block, block_type, basepath):
+        text = f"{block_type.value}\0{basepath}\0{block}"
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        html = self.entries.get(key)
+        if html is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return html
+
+    def put(self, key, html):
+        self.entries[key] = html
+        self.entries.move_to_end(key)
+        self.new_entries[key] = html
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def drain(self):
+        # Hands the entries and counts gathered since the last drain to the
+        # parent process, which merges them into the build-wide cache.
+        delta = {"entries": self.new_entries, "hits": self.hits, "misses": self.misses}
+        self.new_entries = {}
+        self.hits = 0
+        self.misses = 0
+        return delta
+
+    def merge(self, delta):
+        for key, html in delta["entries"].items():
+            self.put(key, html)
+        self.hits += delta["hits"]
+        self.misses += delta["misses"]
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0
+        return f"{self.hits} hits, {self.misses} misses ({rate:.0%} hit rate), {len(self.entries)} entries"
+
+    def load(self, path):
+        if not os.path.exists(path):
+            return
+        with open(path, "r") as cache_file:
+            data = json.load(cache_file)
+        if data.get("version") != GENERATOR_VERSION:
+            return
+        for key, html in data["entries"]:
+            self.entries[key] = html
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def save(self, path):
+        dir_path = os.path.dirname(path)
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+        data = {"version": GENERATOR_VERSION, "entries": list(self.entries.items())}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as cache_file:
+            json.dump(data, cache_file)
+        os.replace(tmp_path, path)
+
+
+def activate(cache):
+    global active
+    previous = active
+    active = cache
+    return previous
+
+
+def init_worker(entries, max_entries):
+    cache = RenderCache(max_entries)
+    cache.entries.update(entries)
+    activate(cache)
@@ -0,0 +1,173 @@
+import bisect
+import json
+import os
+import re
+
+import buildstats
+from dependencies import page_url
+from inline_markdown import text_to_textnodes
+from markdown_blocks import BlockType, iter_blocks
+
+token_pattern = re.compile(r"\w+")
+list_marker_pattern = re.compile(r"^(?:>\s*|[-*] |\d+\. )", re.MULTILINE)
+heading_weights = {1: 8, 2: 6, 3: 4}
+heading_tags = frozenset(f"h{level}" for level in range(1, 7))
+min_token_length = 2
+stop_words = frozenset(
+    "an and are as at be by for from has in is it its of on or that the this to was were will with".split()
+)
+
+active = None
+
+
+class SearchIndex:
+    # Workers return one term map per page they render and the parent only
+    # collects them, so the map is inverted once, when the shards are
+    # written, instead of being merged term by term across processes.
+    def __init__(self, prefix_length=2):
+        self.prefix_length = prefix_length
+        self.pages = {}
+        # The docs, shards and page numbers last written, and the prefixes
+        # changed since, so --watch rebuilds only rewrite what they touch.
+        self.written = None
+        self.stale_prefixes = set()
+
+    def add(self, url, title, terms):
+        # Once the index is written, a page already in it is patched into
+        # the written shards; a new page means inverting them all again.
+        if self.written is not None and url in self.pages:
+            self.patch(url, title, terms)
+        else:
+            self.written = None
+        self.pages[url] = (title, terms)
+
+    def patch(self, url, title, terms):
+        docs, shards, numbers = self.written
+        number = numbers[url]
+        docs[number][1] = title
+        previous_terms = self.pages[url][1]
+        for term in previous_terms.keys() | terms.keys():
+            if previous_terms.get(term) == terms.get(term):
+                continue
+            prefix = term[: self.prefix_length]
+            shard = shards.setdefault(prefix, {})
+            postings = [posting for posting in shard.get(term, []) if posting[0] != number]
+            if term in terms:
+                bisect.insort(postings, [number, terms[term]])
+            if postings:
+                shard[term] = postings
+            else:
+                shard.pop(term, None)
+            if not shard:
+                del shards[prefix]
+            self.stale_prefixes.add(prefix)
+
+    def add_outputs(self, outputs, dest_dir_path, basepath):
+        # Term maps are recorded in the manifest next to each page, so
+        # unchanged pages are indexed without being read again.
+        for dest_path, entry in outputs.items():
+            record = entry.get("search")
+            if record is not None:
+                self.add(basepath + page_url(dest_path, dest_dir_path)[1:], *record)
+
+    def shards(self):
+        # Returns the [url, title] of every page and, per term prefix, the
+        # [page number, weight] postings of each term starting with it.
+        urls = sorted(self.pages)
+        docs = [[url, self.pages[url][0]] for url in urls]
+        shards = {}
+        for number, url in enumerate(urls):
+            for term, weight in self.pages[url][1].items():
+                shard = shards.setdefault(term[: self.prefix_length], {})
+                shard.setdefault(term, []).append([number, weight])
+        return docs, shards
+
+    def write(self, dir_path):
+        # Writes index.json (the page list and prefix length) and one file
+        # per prefix, rewriting only the files whose bytes change; after a
+        # patch only the changed prefixes are serialized at all. Returns
+        # every path so stale shards can be pruned.
+        stats = buildstats.active
+        if self.written is None:
+            docs, shards = self.shards()
+            numbers = {url: number for number, (url, _) in enumerate(docs)}
+            self.written = (docs, shards, numbers)
+            prefixes = set(shards)
+        else:
+            docs, shards, _ = self.written
+            prefixes = self.stale_prefixes & shards.keys()
+        self.stale_prefixes = set()
+        files = {"index.json": {"prefix": self.prefix_length, "docs": docs}}
+        for prefix in prefixes:
+            files[f"{prefix}.json"] = shards[prefix]
+        os.makedirs(dir_path, exist_ok=True)
+        for filename, data in sorted(files.items()):
+            path = os.path.join(dir_path, filename)
+            text = json.dumps(data, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as index_file:
+                    if index_file.read() == text:
+                        continue
+            with open(path, "w", encoding="utf-8") as index_file:
+                index_file.write(text)
+            stats.count("search files written")
+        stats.count("search terms", sum(len(shard) for shard in shards.values()))
+        filenames = ["index.json"] + [f"{prefix}.json" for prefix in shards]
+        return [os.path.join(dir_path, filename) for filename in sorted(filenames)]
+
+
+def page_terms(lines):
+    # Weighted term counts for a page's lines (a list or an open file),
+    # for pages whose terms were not collected while rendering.
+    terms = {}
+    for block, block_type in iter_blocks(lines):
+        add_block_terms(terms, block, block_type)
+    return terms
+
+
+def add_block_terms(terms, block, block_type):
+    # Takes the same TextNodes the renderer sees, so markup never leaks
+    # into the index. Code blocks are left out.
+    weight = 1
+    if block_type == BlockType.CODE:
+        return
+    if block_type == BlockType.HEADING:
+        level = len(block) - len(block.lstrip("#"))
+        weight = heading_weights.get(level, 2)
+        block = block[level + 1 :]
+    elif block_type in (BlockType.QUOTE, BlockType.OLIST, BlockType.ULIST):
+        block = list_marker_pattern.sub("", block)
+    for node in text_to_textnodes(block.replace("\n", " ")):
+        add_text_terms(terms, node.text, weight)
+
+
+def add_node_terms(terms, node):
+    # The same terms, read from a block's rendered nodes: leaf text and
+    # image alt text, weighted by heading level.
+    weight = 1
+    if node.tag is not None and node.tag in heading_tags:
+        weight = heading_weights.get(int(node.tag[1]), 2)
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node.tag == "pre":
+            continue
+        if node.children is not None:
+            stack.extend(node.children)
+        elif node.tag == "img":
+            add_text_terms(terms, node.props.get("alt", ""), weight)
+        elif node.value:
+            add_text_terms(terms, node.value, weight)
+
+
+def add_text_terms(terms, text, weight):
+    for token in token_pattern.findall(text.lower()):
+        if len(token) >= min_token_length and token not in stop_words:
+            terms[token] = terms.get(token, 0) + weight
+
+
+def activate(index):
+    global active
+    previous = active
+    active = index
+    return previous
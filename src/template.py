@@ -0,0 +1,106 @@
+import io
+import os
+import re
+
+import assets
+import images
+
+slot_pattern = re.compile(r"\{\{ (\w+) \}\}")
+root_url_pattern = re.compile(r'\b(href|src)="(/(?!/)[^"]*)')
+
+# Stands in for the basepath in HTML rendered ahead of time, such as cached
+# articles: URLs behind it stay as written and are resolved when filled. A
+# single character can never be split across read chunks.
+basepath_marker = "\0"
+marker_url_pattern = re.compile('\0([^"\\s,]*)')
+
+_template_cache = {}
+
+
+class Template:
+    def __init__(self, source):
+        self.literals = []
+        self.slots = []
+        start = 0
+        for match in slot_pattern.finditer(source):
+            self.literals.append(source[start : match.start()])
+            self.slots.append(match.group(1))
+            start = match.end()
+        self.literals.append(source[start:])
+        self._rewritten = {}
+
+    def literals_for(self, basepath):
+        key = url_context(basepath)
+        literals = self._rewritten.get(key)
+        if literals is None:
+            literals = [
+                root_url_pattern.sub(
+                    lambda m: f'{m.group(1)}="{rewrite_root_url(m.group(2), basepath)}', literal
+                )
+                for literal in self.literals
+            ]
+            self._rewritten[key] = literals
+        return literals
+
+    def root_urls(self):
+        return [
+            match.group(2)
+            for literal in self.literals
+            for match in root_url_pattern.finditer(literal)
+        ]
+
+    def render(self, values, basepath="/"):
+        buffer = io.StringIO()
+        self.write(buffer, values, basepath)
+        return buffer.getvalue()
+
+    def write(self, fp, values, basepath="/"):
+        # Slot values are either strings or nodes that can stream themselves.
+        literals = self.literals_for(basepath)
+        fp.write(literals[0])
+        for slot, literal in zip(self.slots, literals[1:]):
+            if slot not in values:
+                raise ValueError(f"no value for template slot: {slot}")
+            value = values[slot]
+            if isinstance(value, str):
+                fp.write(value)
+            else:
+                value.write_html(fp)
+            fp.write(literal)
+
+
+def load_template(template_path):
+    mtime = os.stat(template_path).st_mtime_ns
+    cached = _template_cache.get(template_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(template_path, "r") as template_file:
+        template = Template(template_file.read())
+    _template_cache[template_path] = (mtime, template)
+    return template
+
+
+def rewrite_root_url(url, basepath):
+    if url.startswith("/") and not url.startswith("//"):
+        if assets.active is not None and basepath != basepath_marker:
+            url = assets.active.url(url)
+        return basepath + url[1:]
+    return url
+
+
+def fill_root_urls(html, basepath):
+    # Resolves URLs rendered behind basepath_marker.
+    if assets.active is None:
+        return html.replace(basepath_marker, basepath)
+    return marker_url_pattern.sub(lambda m: rewrite_root_url("/" + m.group(1), basepath), html)
+
+
+def url_context(basepath):
+    # What rendered root URLs and img tags depend on: the basepath, the
+    # current fingerprints and the image sizes and variants.
+    context = basepath
+    if assets.active is not None:
+        context += f"\0{assets.active.digest}"
+    if images.active is not None:
+        context += f"\0{images.active.digest}"
+    return context
@@ -0,0 +1,161 @@
+import contextlib
+import io
+import os
+import unittest
+
+import assets
+import parsecache
+from assets import AssetMap, build_asset_map
+from copystatic import copy_files_recursive
+from fixtures import TempDirTestCase
+from gencontent import generate_pages_recursive
+from manifest import Manifest
+from template import Template, basepath_marker, fill_root_urls
+
+
+class TestAssets(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.content = os.path.join(self.root, "content")
+        self.docs = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "cat.png"), "png")
+        self.write(os.path.join(self.static, "robots.txt"), "")
+        self.write(self.template, '<link href="/index.css">{{ Content }}')
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n![cat](/images/cat.png)")
+        self.manifest = Manifest(os.path.join(self.root, "manifest.json"), "/", options=["fingerprint"])
+        self.previous = assets.activate(None)
+
+    def tearDown(self):
+        assets.activate(self.previous)
+
+    def read(self, *parts):
+        return super().read(os.path.join(self.docs, *parts))
+
+    def build(self):
+        asset_map = build_asset_map(self.static, self.manifest.file_hash, workers=2)
+        assets.activate(asset_map)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            generate_pages_recursive(
+                self.content,
+                self.template,
+                self.docs,
+                "/site/",
+                self.manifest,
+                dir_path_static=self.static,
+            )
+        self.manifest.save()
+        self.manifest = Manifest(self.manifest.path, "/", options=["fingerprint"])
+        return asset_map, output.getvalue()
+
+    def test_asset_map(self):
+        asset_map = AssetMap()
+        asset_map.add("static/index.css", "/index.css", "0123456789abcdef")
+        self.assertEqual(asset_map.url("/index.css?v=2#top"), "/index.0123456789.css?v=2#top")
+        self.assertEqual(asset_map.url("/other.css"), "/other.css")
+        self.assertEqual(asset_map.names["static/index.css"], "index.0123456789.css")
+
+    def test_build_asset_map(self):
+        asset_map = build_asset_map(self.static, self.manifest.file_hash)
+        self.assertEqual(sorted(asset_map.urls), ["/images/cat.png", "/index.css"])
+        self.assertRegex(asset_map.urls["/images/cat.png"], r"^/images/cat\.[0-9a-f]{10}\.png$")
+        self.assertNotEqual(asset_map.digest, "")
+
+    def test_rewrite_references(self):
+        asset_map = build_asset_map(self.static, self.manifest.file_hash)
+        assets.activate(asset_map)
+        css = asset_map.urls["/index.css"]
+        template = Template('<link href="/index.css"><a href="/about">about</a>')
+        self.assertEqual(
+            template.render({}, "/site/"),
+            f'<link href="/site{css}"><a href="/site/about">about</a>',
+        )
+        html = f'<img src="{basepath_marker}images/cat.png"><a href="{basepath_marker}">home</a>'
+        self.assertEqual(
+            fill_root_urls(html, "/site/"),
+            f'<img src="/site{asset_map.urls["/images/cat.png"]}"><a href="/site/">home</a>',
+        )
+
+    def test_asset_change_rebuilds_pages(self):
+        previous_cache = parsecache.activate(parsecache.ParseCache(os.path.join(self.root, "pages")))
+        try:
+            asset_map, _ = self.build()
+            page = self.read("index.html")
+            self.assertIn(f'href="/site{asset_map.urls["/index.css"]}"', page)
+            self.assertIn(f'src="/site{asset_map.urls["/images/cat.png"]}"', page)
+            self.assertEqual(self.build()[1], "")
+
+            self.write(os.path.join(self.static, "images", "cat.png"), "new png")
+            asset_map, output = self.build()
+            self.assertIn("index.md", output)
+            self.assertIn(f'src="/site{asset_map.urls["/images/cat.png"]}"', self.read("index.html"))
+
+            self.write(os.path.join(self.static, "index.css"), "body { color: red }")
+            asset_map, output = self.build()
+            self.assertIn("index.md", output)
+            self.assertIn(f'href="/site{asset_map.urls["/index.css"]}"', self.read("index.html"))
+        finally:
+            parsecache.activate(previous_cache)
+
+    def test_added_asset_rebuilds_pages(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n![new](/images/new.png)")
+        self.build()
+        self.assertIn('src="/site/images/new.png"', self.read("index.html"))
+
+        self.write(os.path.join(self.static, "images", "new.png"), "new png")
+        asset_map, output = self.build()
+        self.assertIn("index.md", output)
+        incremental = self.read("index.html")
+
+        os.remove(os.path.join(self.docs, "index.html"))
+        self.manifest.clear()
+        self.build()
+        self.assertEqual(incremental, self.read("index.html"))
+        self.assertIn(f'src="/site{asset_map.urls["/images/new.png"]}"', incremental)
+
+    def test_stylesheet_references(self):
+        self.write(
+            os.path.join(self.static, "index.css"),
+            '@import "theme/dark.css";\n'
+            "body { background: url(/images/cat.png) }\n"
+            "i { background: url('data:image/png;base64,AA') }",
+        )
+        self.write(
+            os.path.join(self.static, "theme", "dark.css"),
+            'p { background: url("../images/cat.png?v=1#x") }',
+        )
+        cache = os.path.join(self.root, "assets")
+        asset_map = build_asset_map(self.static, self.manifest.file_hash, dir_path_cache=cache)
+        assets.activate(asset_map)
+        with contextlib.redirect_stdout(io.StringIO()):
+            copy_files_recursive(self.static, self.docs, self.manifest)
+
+        cat = os.path.basename(asset_map.urls["/images/cat.png"])
+        dark = os.path.basename(asset_map.urls["/theme/dark.css"])
+        self.assertEqual(
+            self.read(asset_map.urls["/theme/dark.css"].lstrip("/")),
+            f'p {{ background: url("../images/{cat}?v=1#x") }}',
+        )
+        self.assertEqual(
+            self.read(asset_map.urls["/index.css"].lstrip("/")),
+            f'@import "theme/{dark}";\n'
+            f"body {{ background: url(/images/{cat}) }}\n"
+            "i { background: url('data:image/png;base64,AA') }",
+        )
+        cat_path = os.path.join(self.static, "images", "cat.png")
+        self.assertEqual(
+            asset_map.dependencies[os.path.join(self.static, "index.css")],
+            [os.path.join(self.static, "theme", "dark.css"), cat_path],
+        )
+
+        # A new image renames both stylesheets.
+        self.write(cat_path, "new png")
+        renamed = build_asset_map(self.static, self.manifest.file_hash, dir_path_cache=cache)
+        self.assertNotEqual(renamed.urls["/theme/dark.css"], asset_map.urls["/theme/dark.css"])
+        self.assertNotEqual(renamed.urls["/index.css"], asset_map.urls["/index.css"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import time
+import unittest
+
+import buildstats
+from buildstats import BuildStats, count_nodes, null_stats
+from htmlnode import LeafNode, ParentNode
+from markdown_blocks import markdown_to_html_node
+
+
+class TestBuildStats(unittest.TestCase):
+    def test_phase(self):
+        stats = BuildStats()
+        with stats.phase("parse"):
+            pass
+        with stats.phase("parse"):
+            pass
+        wall, cpu, calls = stats.phases["parse"]
+        self.assertEqual(calls, 2)
+        self.assertGreaterEqual(wall, 0)
+        self.assertGreaterEqual(cpu, 0)
+
+    def test_nested_phases(self):
+        stats = BuildStats()
+        with stats.phase("render"):
+            with stats.phase("markdown"):
+                time.sleep(0.05)
+        self.assertGreaterEqual(stats.phases["markdown"][0], 0.05)
+        self.assertLess(stats.phases["render"][0], 0.05)
+        self.assertEqual(stats.phases["render"][2], 1)
+
+    def test_merge(self):
+        stats = BuildStats()
+        stats.count("pages")
+        other = BuildStats()
+        other.add_phase("write", 0.5, 0.25)
+        other.count("pages", 2)
+        other.add_page("content/index.md", 0.5)
+        stats.merge(other.to_dict())
+        self.assertEqual(stats.phases["write"], [0.5, 0.25, 1])
+        self.assertEqual(stats.counters["pages"], 3)
+        self.assertEqual(stats.slowest_pages(1), [("content/index.md", 0.5)])
+
+    def test_null_stats(self):
+        self.assertFalse(null_stats.enabled)
+        with null_stats.phase("parse"):
+            null_stats.count("pages")
+
+    def test_markdown_hooks(self):
+        stats = BuildStats()
+        previous = buildstats.activate(stats)
+        try:
+            markdown_to_html_node("# title\n\nsome **bold** text")
+        finally:
+            buildstats.activate(previous)
+        self.assertEqual(stats.phases["parse blocks"][2], 1)
+        self.assertEqual(stats.phases["inline parse"][2], 2)
+
+    def test_count_nodes(self):
+        node = ParentNode("p", [LeafNode("b", "bold"), LeafNode(None, "text")])
+        self.assertEqual(count_nodes(node), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import unittest
+
+import assets
+from copystatic import copy_files_recursive
+from fixtures import TempDirTestCase
+
+
+class TestCopyFilesRecursive(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.docs = os.path.join(self.root, "docs")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "tom.png"), "png")
+
+    def test_copy(self):
+        copy_files_recursive(self.static, self.docs)
+        self.assertEqual(self.read(os.path.join(self.docs, "index.css")), "body {}")
+        self.assertEqual(self.read(os.path.join(self.docs, "images", "tom.png")), "png")
+
+    def test_copy_fingerprinted(self):
+        asset_map = assets.AssetMap()
+        from_path = os.path.join(self.static, "images", "tom.png")
+        asset_map.add(from_path, "/images/tom.png", "abcdef0123456789")
+        previous = assets.activate(asset_map)
+        try:
+            copy_files_recursive(self.static, self.docs)
+        finally:
+            assets.activate(previous)
+        self.assertEqual(self.read(os.path.join(self.docs, "images", "tom.abcdef0123.png")), "png")
+        self.assertEqual(self.read(os.path.join(self.docs, "index.css")), "body {}")
+
+    def test_copy_concurrent(self):
+        for i in range(20):
+            self.write(os.path.join(self.static, "images", f"{i}.png"), f"png {i}")
+        copy_files_recursive(self.static, self.docs, workers=4)
+        for i in range(20):
+            self.assertEqual(self.read(os.path.join(self.docs, "images", f"{i}.png")), f"png {i}")
+
+    def test_skip_unchanged(self):
+        copy_files_recursive(self.static, self.docs)
+        dest_path = os.path.join(self.docs, "index.css")
+        inode = os.stat(dest_path).st_ino
+        copy_files_recursive(self.static, self.docs)
+        self.assertEqual(os.stat(dest_path).st_ino, inode)
+
+    def test_recopy_changed(self):
+        copy_files_recursive(self.static, self.docs)
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        copy_files_recursive(self.static, self.docs)
+        self.assertEqual(self.read(os.path.join(self.docs, "index.css")), "body { margin: 0 }")
+
+    def test_hardlink(self):
+        copy_files_recursive(self.static, self.docs, mode="hardlink")
+        self.assertTrue(
+            os.path.samefile(
+                os.path.join(self.static, "index.css"), os.path.join(self.docs, "index.css")
+            )
+        )
+
+    def test_copy_replaces_hardlink(self):
+        copy_files_recursive(self.static, self.docs, mode="hardlink")
+        self.write(os.path.join(self.static, "new.css"), "body { margin: 0 }")
+        os.replace(os.path.join(self.static, "new.css"), os.path.join(self.static, "index.css"))
+        copy_files_recursive(self.static, self.docs, mode="copy")
+        self.assertFalse(
+            os.path.samefile(
+                os.path.join(self.static, "index.css"), os.path.join(self.docs, "index.css")
+            )
+        )
+        self.assertEqual(self.read(os.path.join(self.static, "index.css")), "body { margin: 0 }")
+        self.assertEqual(self.read(os.path.join(self.docs, "index.css")), "body { margin: 0 }")
+
+    def test_reflink(self):
+        copy_files_recursive(self.static, self.docs, mode="reflink")
+        self.assertEqual(self.read(os.path.join(self.docs, "images", "tom.png")), "png")
+
+
+if __name__ == "__main__":
+    unittest.main()
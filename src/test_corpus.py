@@ -0,0 +1,40 @@
+import os
+import random
+import tempfile
+import unittest
+
+from corpus import generate_corpus, synthetic_page
+from gencontent import extract_title
+from markdown_blocks import markdown_to_html_node
+
+
+class TestCorpus(unittest.TestCase):
+    def test_synthetic_page_deterministic(self):
+        self.assertEqual(
+            synthetic_page(random.Random(1), 2048),
+            synthetic_page(random.Random(1), 2048),
+        )
+
+    def test_synthetic_page_renders(self):
+        page = synthetic_page(random.Random(2), 8192)
+        self.assertGreaterEqual(len(page), 8192)
+        self.assertTrue(extract_title(page).startswith("Page "))
+        markdown_to_html_node(page).to_html()
+
+    def test_block_mix(self):
+        page = synthetic_page(random.Random(3), 2048, block_mix={"code": 1})
+        blocks = page.strip().split("\n\n")[1:]
+        self.assertTrue(all(block.startswith("```") for block in blocks))
+
+    def test_generate_corpus(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            total_bytes = generate_corpus(tmp, 10, depth=2, page_size=512, seed=4)
+            paths = []
+            for dir_path, _, filenames in os.walk(tmp):
+                paths.extend(os.path.join(dir_path, filename) for filename in filenames)
+            self.assertEqual(len(paths), 10)
+            self.assertEqual(total_bytes, sum(os.path.getsize(path) for path in paths))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import unittest
+
+from dependencies import page_references, page_sources, resolve_references, site_path
+from fixtures import TempDirTestCase
+
+
+class TestDependencies(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+
+    def test_page_references(self):
+        path = os.path.join(self.content, "index.md")
+        self.write(
+            path,
+            "# Home\n\n![cat](/cat.png) and [blog](/blog)\n\n"
+            "```\n[not](/a/link)\n\n![nor](/an/image)\n```\n\n"
+            "`[code](/span)` [after](about.html)\n",
+        )
+        with open(path) as f:
+            images, links = page_references(f)
+        self.assertEqual(images, [("/cat.png", 3)])
+        self.assertEqual(links, [("/blog", 3), ("about.html", 11)])
+
+    def test_site_path(self):
+        self.assertEqual(site_path("/blog/", "/index.html"), "/blog/")
+        self.assertEqual(site_path("../cat.png#top", "/blog/tom/index.html"), "/blog/cat.png")
+        self.assertEqual(site_path("/", "/blog/index.html"), "/")
+        self.assertIsNone(site_path("https://example.com/", "/index.html"))
+        self.assertIsNone(site_path("//example.com/", "/index.html"))
+        self.assertIsNone(site_path("mailto:me@example.com", "/index.html"))
+        self.assertIsNone(site_path("#top", "/index.html"))
+
+    def test_page_sources(self):
+        self.assertEqual(page_sources("/"), ["/index.md"])
+        self.assertEqual(page_sources("/blog/tom.html"), ["/blog/tom.md"])
+        self.assertEqual(page_sources("/blog/tom"), ["/blog/tom.md", "/blog/tom/index.md"])
+
+    def test_resolve_references(self):
+        self.write(os.path.join(self.static, "images", "cat.png"))
+        self.write(os.path.join(self.content, "index.md"))
+        self.write(os.path.join(self.content, "blog", "tom", "index.md"))
+        references = (
+            [("/images/cat.png", 1), ("/images/missing.png", 2)],
+            [("/", 3), ("../tom", 4), ("https://example.com", 5)],
+        )
+        static_paths, linked_pages = resolve_references(
+            references, "/blog/majesty/index.html", self.content, self.static
+        )
+        self.assertEqual(
+            static_paths,
+            [
+                os.path.join(self.static, "images", "cat.png"),
+                os.path.join(self.static, "images", "missing.png"),
+            ],
+        )
+        self.assertEqual(
+            linked_pages,
+            [
+                os.path.join(self.content, "index.md"),
+                os.path.join(self.content, "blog", "tom", "index.md"),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
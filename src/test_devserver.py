@@ -0,0 +1,54 @@
+import os
+import unittest
+
+from devserver import TreeWatcher, inject_livereload, livereload_script
+from fixtures import TempDirTestCase
+
+
+class TestLiveReload(unittest.TestCase):
+    def test_inject(self):
+        html = inject_livereload("<html><body><p>hi</p></body></html>")
+        self.assertEqual(html, f"<html><body><p>hi</p>{livereload_script}</body></html>")
+
+    def test_inject_no_body(self):
+        self.assertEqual(inject_livereload("<p>hi</p>"), f"<p>hi</p>{livereload_script}")
+
+
+class TestTreeWatcher(TempDirTestCase):
+    def test_changed_paths(self):
+        kept = os.path.join(self.root, "kept.md")
+        edited = os.path.join(self.root, "blog", "edited.md")
+        removed = os.path.join(self.root, "removed.md")
+        for path in (kept, edited, removed):
+            self.write(path, "# title")
+        watcher = TreeWatcher([self.root], full_scan_every=1)
+
+        self.write(edited, "# a longer title")
+        os.remove(removed)
+        added = os.path.join(self.root, "blog", "added.md")
+        self.write(added, "# title")
+
+        self.assertEqual(watcher.poll(), sorted([added, edited, removed]))
+        self.assertEqual(watcher.poll(), [])
+
+    def test_in_place_edit_waits_for_full_scan(self):
+        edited = os.path.join(self.root, "blog", "edited.md")
+        self.write(edited, "# title")
+        watcher = TreeWatcher([self.root], full_scan_every=2)
+
+        self.write(edited, "# a longer title")
+        self.assertEqual(watcher.poll(), [])
+        self.assertEqual(watcher.poll(), [edited])
+
+    def test_renamed_save_seen_at_once(self):
+        edited = os.path.join(self.root, "blog", "edited.md")
+        self.write(edited, "# title")
+        watcher = TreeWatcher([self.root], full_scan_every=10)
+
+        self.write(edited + ".tmp", "# a longer title")
+        os.replace(edited + ".tmp", edited)
+        self.assertEqual(watcher.poll(), [edited])
+
+
+if __name__ == "__main__":
+    unittest.main()
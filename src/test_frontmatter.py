@@ -0,0 +1,60 @@
+import io
+import unittest
+
+from frontmatter import split_front_matter
+
+
+class TestSplitFrontMatter(unittest.TestCase):
+    def test_no_front_matter(self):
+        metadata, body = split_front_matter(["# Title", "", "text"])
+        self.assertEqual(metadata, {})
+        self.assertEqual(list(body), ["# Title", "", "text"])
+
+    def test_values(self):
+        metadata, body = split_front_matter(
+            [
+                "---",
+                "title: \"Tom: a mistake\"",
+                "date: 2024-01-05",
+                "draft: false",
+                "weight: 3",
+                "# a comment",
+                "tags: [tolkien, 'lotr']",
+                "authors:",
+                "  - Archmage",
+                "  - Gandalf",
+                "summary:",
+                "---",
+                "# Title",
+            ]
+        )
+        self.assertEqual(
+            metadata,
+            {
+                "title": "Tom: a mistake",
+                "date": "2024-01-05",
+                "draft": False,
+                "weight": 3,
+                "tags": ["tolkien", "lotr"],
+                "authors": ["Archmage", "Gandalf"],
+                "summary": None,
+            },
+        )
+        self.assertEqual(list(body), ["# Title"])
+
+    def test_file_body_is_left_unread(self):
+        page = io.StringIO("---\ndraft: true\n---\n# Title\n\ntext\n")
+        metadata, body = split_front_matter(page)
+        self.assertEqual(metadata, {"draft": True})
+        self.assertEqual(next(body), "# Title\n")
+        self.assertEqual(page.read(), "\ntext\n")
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            split_front_matter(["---", "title: Tom"])
+        with self.assertRaises(ValueError):
+            split_front_matter(["---", "not a key", "---"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,14 @@
+import contextlib
+import io
+import os
 import unittest
 
-from gencontent import extract_title
+import buildstats
+import gencontent
+from buildstats import BuildStats
+from fixtures import TempDirTestCase
+from gencontent import discover_pages, extract_title, generate_pages_recursive
+from manifest import Manifest
 
 
 class TestExtractTitle(unittest.TestCase):
@@ -46,5 +54,117 @@ no title
             pass
 
 
+class TestGeneratePages(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.docs = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "a", "index.md"), "# A")
+        self.write(os.path.join(self.content, "blog", "b", "index.md"), "# B")
+
+    def read(self, *parts):
+        return super().read(os.path.join(self.docs, *parts))
+
+    def test_discover_pages(self):
+        pages = discover_pages(self.content, self.docs)
+        self.assertEqual(
+            [str(dest_path) for _, dest_path in pages],
+            [
+                os.path.join(self.docs, "blog", "a", "index.html"),
+                os.path.join(self.docs, "blog", "b", "index.html"),
+                os.path.join(self.docs, "index.html"),
+            ],
+        )
+
+    def test_generate_parallel(self):
+        generate_pages_recursive(self.content, self.template, self.docs, "/", jobs=2)
+        self.assertEqual(self.read("index.html"), "<title>Home</title><div><h1>Home</h1></div>")
+        self.assertEqual(self.read("blog", "b", "index.html"), "<title>B</title><div><h1>B</h1></div>")
+
+    def test_generate_parallel_errors(self):
+        self.write(os.path.join(self.content, "blog", "a", "index.md"), "no title")
+        with self.assertRaises(ValueError) as cm:
+            generate_pages_recursive(self.content, self.template, self.docs, "/", jobs=2)
+        self.assertIn(os.path.join("blog", "a", "index.md"), str(cm.exception))
+        self.assertEqual(self.read("blog", "b", "index.html"), "<title>B</title><div><h1>B</h1></div>")
+
+    def test_failed_page_leaves_no_output(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nunclosed **bold")
+        with self.assertRaises(ValueError):
+            generate_pages_recursive(self.content, self.template, self.docs, "/")
+        self.assertEqual(os.listdir(self.docs), ["blog"])
+
+    def test_large_pages_are_streamed(self):
+        self.write(os.path.join(self.content, "blog", "a", "index.md"), "# A\n\n[home](/)")
+        generate_pages_recursive(self.content, self.template, self.docs, "/site/")
+        buffered = self.read("blog", "a", "index.html")
+        previous = gencontent.stream_threshold
+        gencontent.stream_threshold = 0
+        try:
+            generate_pages_recursive(self.content, self.template, self.docs, "/site/")
+        finally:
+            gencontent.stream_threshold = previous
+        self.assertEqual(self.read("blog", "a", "index.html"), buffered)
+        self.assertEqual(buffered, '<title>A</title><div><h1>A</h1><p><a href="/site/">home</a></p></div>')
+
+    def test_stats_cover_streamed_pages(self):
+        stats = BuildStats()
+        previous = buildstats.activate(stats)
+        previous_threshold = gencontent.stream_threshold
+        gencontent.stream_threshold = 0
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(self.content, self.template, self.docs, "/")
+        finally:
+            gencontent.stream_threshold = previous_threshold
+            buildstats.activate(previous)
+        self.assertEqual(stats.phases["parse blocks"][2], 6)
+        self.assertEqual(stats.phases["serialize"][2], 3)
+        self.assertEqual(stats.counters["nodes"], 6)
+        pages = [("index.html",), ("blog", "a", "index.html"), ("blog", "b", "index.html")]
+        written = sum(len(self.read(*parts)) for parts in pages)
+        self.assertEqual(stats.counters["bytes written"], written)
+
+    def test_serial_build_keeps_active_stats(self):
+        stats = BuildStats()
+        previous = buildstats.activate(stats)
+        try:
+            page = (os.path.join(self.content, "index.md"), os.path.join(self.docs, "index.html"))
+            batch = ([page], self.template, "/", True, False, set())
+            results, batch_stats, _ = gencontent.generate_page_batch(batch, False)
+            self.assertIs(buildstats.active, stats)
+        finally:
+            buildstats.activate(previous)
+        self.assertEqual(results[0][0], None)
+        self.assertIsNone(batch_stats)
+        self.assertIn("parse blocks", stats.phases)
+
+    def test_image_change_rebuilds_referencing_page(self):
+        static = os.path.join(self.root, "static")
+        image = os.path.join(static, "cat.png")
+        self.write(image, "png")
+        self.write(os.path.join(self.content, "blog", "a", "index.md"), "# A\n\n![cat](/cat.png)")
+        manifest_path = os.path.join(self.root, "manifest.json")
+
+        def build():
+            manifest = Manifest(manifest_path, "/")
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                generate_pages_recursive(
+                    self.content, self.template, self.docs, "/", manifest, dir_path_static=static
+                )
+            manifest.save()
+            return output.getvalue()
+
+        build()
+        self.assertEqual(build(), "")
+        self.write(image, "new png")
+        from_path = os.path.join(self.content, "blog", "a", "index.md")
+        dest_path = os.path.join(self.docs, "blog", "a", "index.html")
+        self.assertEqual(build(), f" * {from_path} {self.template} -> {dest_path}\n")
+
+
 if __name__ == "__main__":
     unittest.main()
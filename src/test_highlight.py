@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+
+import buildstats
+import highlight
+from markdown_blocks import markdown_to_html_node
+
+
+class TestHighlight(unittest.TestCase):
+    def setUp(self):
+        self.previous = highlight.activate(highlight.Highlighter())
+
+    def tearDown(self):
+        highlight.activate(self.previous)
+
+    def test_python(self):
+        self.assertEqual(
+            highlight.active.highlight("py", 'def f():  # note\n    return "<b>", 1\n'),
+            '<span class="hl-keyword">def</span> f():  <span class="hl-comment"># note</span>\n'
+            '    <span class="hl-keyword">return</span> <span class="hl-string">"&lt;b&gt;"</span>, '
+            '<span class="hl-number">1</span>\n',
+        )
+
+    def test_languages(self):
+        self.assertEqual(
+            highlight.active.highlight("json", '{"a": true}'),
+            '{<span class="hl-property">"a"</span>: <span class="hl-keyword">true</span>}',
+        )
+        self.assertEqual(
+            highlight.active.highlight("bash", "echo $HOME"),
+            '<span class="hl-builtin">echo</span> <span class="hl-variable">$HOME</span>',
+        )
+        self.assertEqual(
+            highlight.active.highlight("html", '<a href="/">'),
+            '<span class="hl-tag">&lt;a</span> <span class="hl-attribute">href</span>='
+            '<span class="hl-string">"/"</span><span class="hl-tag">&gt;</span>',
+        )
+        self.assertEqual(
+            highlight.active.highlight("css", "p { color: #fff; }"),
+            'p { <span class="hl-property">color</span>: <span class="hl-number">#fff</span>; }',
+        )
+        self.assertIsNone(highlight.active.highlight("rust", "fn main() {}"))
+
+    def test_code_block(self):
+        node = markdown_to_html_node("```sh\nls\n```")
+        self.assertEqual(
+            node.to_html(),
+            '<div><pre><code class="language-sh"><span class="hl-builtin">ls</span>\n'
+            "</code></pre></div>",
+        )
+
+    def test_memoized_across_runs(self):
+        stats = buildstats.BuildStats()
+        previous_stats = buildstats.activate(stats)
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "highlight.json")
+                html = highlight.active.highlight("python", "x = 1\n")
+                self.assertEqual(highlight.active.highlight("python", "x = 1\n"), html)
+                highlight.active.cache.save(path)
+
+                highlighter = highlight.Highlighter()
+                highlighter.cache.load(path)
+                self.assertEqual(highlighter.highlight("python", "x = 1\n"), html)
+        finally:
+            buildstats.activate(previous_stats)
+        self.assertEqual(stats.counters["highlight cache misses"], 1)
+        self.assertEqual(stats.counters["highlight cache hits"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
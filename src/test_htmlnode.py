@@ -1,3 +1,4 @@
+import io
 import unittest
 from htmlnode import LeafNode, ParentNode, HTMLNode
 
@@ -49,6 +50,10 @@ class TestHTMLNode(unittest.TestCase):
             "HTMLNode(p, What a strange world, children: None, {'class': 'primary'})",
         )
 
+    def test_slots(self):
+        for node in (HTMLNode("p"), LeafNode("b", "bold"), ParentNode("p", [])):
+            self.assertFalse(hasattr(node, "__dict__"))
+
     def test_leaf_to_html_p(self):
         node = LeafNode("p", "Hello, world!")
         self.assertEqual(node.to_html(), "<p>Hello, world!</p>")
@@ -108,6 +113,23 @@ class TestHTMLNode(unittest.TestCase):
             "<h2><b>Bold text</b>Normal text<i>italic text</i>Normal text</h2>",
         )
 
+    def test_write_html(self):
+        node = ParentNode(
+            "p",
+            [
+                LeafNode("b", "Bold text"),
+                LeafNode("a", "link", {"href": "/blog"}),
+            ],
+            {"class": "intro"},
+        )
+        buffer = io.StringIO()
+        node.write_html(buffer)
+        self.assertEqual(
+            buffer.getvalue(),
+            '<p class="intro"><b>Bold text</b><a href="/blog">link</a></p>',
+        )
+        self.assertEqual(buffer.getvalue(), node.to_html())
+
 
 if __name__ == "__main__":
     unittest.main()
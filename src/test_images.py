@@ -0,0 +1,119 @@
+import os
+import shutil
+import struct
+import unittest
+
+import assets
+import images
+from fixtures import TempDirTestCase
+from gencontent import finish_node
+from htmlnode import LeafNode
+from images import build_image_map, image_size
+from manifest import Manifest
+from template import basepath_marker, fill_root_urls
+
+
+def png(width, height):
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", width, height)
+
+
+def jpeg(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + bytes(9)
+    sof0 = b"\xff\xc0" + struct.pack(">HBHH", 17, 8, height, width) + bytes(10)
+    return b"\xff\xd8" + app0 + sof0
+
+
+class TestImages(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.cache = os.path.join(self.root, "cache")
+        self.write(os.path.join(self.static, "images", "wide.png"), png(1200, 600))
+        self.write(os.path.join(self.static, "images", "small.png"), png(300, 200))
+        self.manifest = Manifest(os.path.join(self.root, "manifest.json"), "/")
+        self.previous = (images.activate(None), assets.activate(None), images.Image, images.make_variant)
+
+    def tearDown(self):
+        images.activate(self.previous[0])
+        assets.activate(self.previous[1])
+        images.Image, images.make_variant = self.previous[2:]
+
+    def fake_pillow(self):
+        made = []
+
+        def make_variant(from_path, cache_path, width):
+            made.append(width)
+            shutil.copyfile(from_path, cache_path)
+
+        images.Image = object()
+        images.make_variant = make_variant
+        return made
+
+    def test_image_size(self):
+        self.write(os.path.join(self.static, "a.gif"), b"GIF89a" + struct.pack("<HH", 40, 30))
+        self.write(os.path.join(self.static, "a.jpg"), jpeg(640, 480))
+        self.write(os.path.join(self.static, "a.txt"), b"not an image")
+        extended = b"\x00" * 4 + struct.pack("<I", 319)[:3] + struct.pack("<I", 239)[:3]
+        for name, chunk, data in (
+            ("lossy", b"VP8 ", b"\x00\x00\x00\x9d\x01\x2a" + struct.pack("<HH", 320, 240)),
+            ("lossless", b"VP8L", b"\x2f" + struct.pack("<I", 319 | 239 << 14) + b"\x00" * 5),
+            ("extended", b"VP8X", extended),
+        ):
+            self.write(
+                os.path.join(self.static, f"{name}.webp"),
+                b"RIFF" + struct.pack("<I", 22) + b"WEBP" + chunk + struct.pack("<I", 10) + data,
+            )
+        self.assertEqual(image_size(os.path.join(self.static, "images", "wide.png")), (1200, 600))
+        self.assertEqual(image_size(os.path.join(self.static, "a.gif")), (40, 30))
+        self.assertEqual(image_size(os.path.join(self.static, "a.jpg")), (640, 480))
+        self.assertIsNone(image_size(os.path.join(self.static, "a.txt")))
+        for name in ("lossy", "lossless", "extended"):
+            self.assertEqual(image_size(os.path.join(self.static, f"{name}.webp")), (320, 240))
+
+    def test_without_pillow(self):
+        images.Image = None
+        image_map = build_image_map(self.static, self.cache, self.manifest.file_hash)
+        self.assertEqual(image_map.get("/images/wide.png"), (1200, 600, []))
+        self.assertEqual(image_map.variants, [])
+
+    def test_variants_cached(self):
+        made = self.fake_pillow()
+        image_map = build_image_map(self.static, self.cache, self.manifest.file_hash, workers=2)
+        self.assertEqual(sorted(made), [480, 960])
+        self.assertEqual(
+            image_map.get("/images/wide.png?v=1"),
+            (1200, 600, [("/images/wide.480w.png", 480), ("/images/wide.960w.png", 960)]),
+        )
+        self.assertEqual(image_map.get("/images/small.png"), (300, 200, []))
+
+        made.clear()
+        build_image_map(self.static, self.cache, self.manifest.file_hash)
+        self.assertEqual(made, [])
+
+    def test_img_tags(self):
+        self.fake_pillow()
+        images.activate(build_image_map(self.static, self.cache, self.manifest.file_hash))
+        node = LeafNode("img", "", {"src": "/images/wide.png", "alt": "wide"})
+        finish_node(node, "/site/")
+        self.assertEqual(
+            node.to_html(),
+            '<img src="/site/images/wide.png" alt="wide" width="1200" height="600" loading="lazy" '
+            'srcset="/site/images/wide.480w.png 480w, /site/images/wide.960w.png 960w, '
+            '/site/images/wide.png 1200w" sizes="(max-width: 1200px) 100vw, 1200px"></img>',
+        )
+
+    def test_img_tags_behind_marker(self):
+        self.fake_pillow()
+        images.activate(build_image_map(self.static, self.cache, self.manifest.file_hash))
+        node = LeafNode("img", "", {"src": "/images/wide.png", "alt": "wide"})
+        finish_node(node, basepath_marker)
+        asset_map = assets.AssetMap()
+        asset_map.add("wide.480w.png", "/images/wide.480w.png", "0123456789abcdef")
+        assets.activate(asset_map)
+        html = fill_root_urls(node.to_html(), "/site/")
+        self.assertIn('src="/site/images/wide.png"', html)
+        self.assertIn('srcset="/site/images/wide.480w.0123456789.png 480w, ', html)
+
+
+if __name__ == "__main__":
+    unittest.main()
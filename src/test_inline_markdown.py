@@ -4,6 +4,7 @@ from inline_markdown import (
     split_nodes_image,
     split_nodes_link,
     text_to_textnodes,
+    text_to_html_nodes,
     extract_markdown_links,
     extract_markdown_images,
 )
@@ -191,6 +192,41 @@ class TestInlineMarkdown(unittest.TestCase):
             nodes,
         )
 
+    def test_text_to_textnodes_url_with_underscores(self):
+        nodes = text_to_textnodes(
+            "See [the docs](https://example.com/some_page_name) and `snake_case`"
+        )
+        self.assertListEqual(
+            [
+                TextNode("See ", TextType.TEXT),
+                TextNode("the docs", TextType.LINK, "https://example.com/some_page_name"),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("snake_case", TextType.CODE),
+            ],
+            nodes,
+        )
+
+    def test_text_to_html_nodes(self):
+        nodes = text_to_html_nodes("This is **text** with a [link](https://boot.dev)")
+        self.assertEqual(
+            "".join(node.to_html() for node in nodes),
+            'This is <b>text</b> with a <a href="https://boot.dev">link</a>',
+        )
+
+    def test_text_to_textnodes_unclosed(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("This is **not closed")
+
+    def test_text_to_textnodes_matches_split_passes(self):
+        text = "**a** _b_ `c` ![d](/d.png) [e](/e) plain **f**[g](/g)![h](/h.png)"
+        nodes = [TextNode(text, TextType.TEXT)]
+        nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+        nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+        nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+        nodes = split_nodes_image(nodes)
+        nodes = split_nodes_link(nodes)
+        self.assertListEqual(nodes, text_to_textnodes(text))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,62 @@
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from gencontent import generate_pages_recursive
+from linkcheck import OutputIndex, check_links, format_broken_link
+from manifest import Manifest
+
+
+class TestOutputIndex(unittest.TestCase):
+    def test_contains(self):
+        index = OutputIndex(
+            ["docs/index.html", "docs/blog/tom/index.html", "docs/about.html", "docs/cat.png"],
+            "docs",
+        )
+        self.assertIn("/", index)
+        self.assertIn("/blog/tom", index)
+        self.assertIn("/blog/tom/", index)
+        self.assertIn("/about", index)
+        self.assertIn("/cat.png", index)
+        self.assertNotIn("/blog/", index)
+        self.assertNotIn("/dog.png", index)
+
+    def test_dot_prefix(self):
+        index = OutputIndex(["docs/index.html", "docs/cat.png", "other/dog.png"], "./docs")
+        self.assertIn("/", index)
+        self.assertIn("/cat.png", index)
+        self.assertIn("/../other/dog.png", index)
+
+
+class TestCheckLinks(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.docs = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, "{{ Title }}{{ Content }}")
+
+    def test_check_links(self):
+        index_path = os.path.join(self.content, "index.md")
+        self.write(
+            index_path,
+            "# Home\n\n[tom](/blog/tom) [gone](/blog/gone)\n\n"
+            "![cat](/cat.png) [out](https://example.com) [top](#top)",
+        )
+        self.write(os.path.join(self.content, "blog", "tom", "index.md"), "# Tom\n\n[home](../../)")
+        self.write(os.path.join(self.docs, "dog.png"), "png")
+        manifest = Manifest(os.path.join(self.root, "manifest.json"), "/")
+        generate_pages_recursive(self.content, self.template, self.docs, "/", manifest)
+        manifest.record(os.path.join(self.docs, "dog.png"), [])
+
+        broken = check_links(manifest.outputs, self.docs)
+        self.assertEqual(
+            [format_broken_link(broken_link) for broken_link in broken],
+            [f"{index_path}:3: broken link /blog/gone", f"{index_path}:5: broken image /cat.png"],
+        )
+        tom_dest_path = os.path.join(self.docs, "blog", "tom", "index.html")
+        self.assertEqual(check_links(manifest.outputs, self.docs, [tom_dest_path]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
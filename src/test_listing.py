@@ -0,0 +1,89 @@
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from gencontent import generate_pages_recursive
+from listing import generate_listings
+from manifest import Manifest
+
+
+class TestListings(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.docs = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+        self.write(self.template, "{{ Title }}|{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        for name, date in (("a", "2024-01-01"), ("b", "2024-03-01"), ("c", None), ("d", "2024-02-01")):
+            self.write_post(name, date)
+
+    def write_post(self, name, date, title=None):
+        front_matter = f"---\ndate: {date}\n---\n" if date is not None else ""
+        self.write(
+            os.path.join(self.content, "blog", name, "index.md"),
+            f"{front_matter}# {title or name.upper()}",
+        )
+
+    def build(self):
+        manifest = Manifest(self.manifest_path, "/site/")
+        page_index = generate_pages_recursive(
+            self.content, self.template, self.docs, "/site/", manifest
+        )
+        written = generate_listings(
+            page_index, ["blog"], self.content, self.template, self.docs, "/site/", manifest, 2
+        )
+        manifest.save()
+        return written
+
+    def read(self, *parts):
+        return super().read(os.path.join(self.docs, *parts, "index.html"))
+
+    def test_paginated_listing(self):
+        self.assertEqual(self.build(), 2)
+        self.assertEqual(
+            self.read("blog"),
+            "Blog|<div><h1>Blog</h1><ul>"
+            '<li><a href="/site/blog/b/">B</a> <time datetime="2024-03-01">2024-03-01</time></li>'
+            '<li><a href="/site/blog/d/">D</a> <time datetime="2024-02-01">2024-02-01</time></li>'
+            '</ul><nav><a href="/site/blog/page/2/" rel="next">Older posts</a></nav></div>',
+        )
+        self.assertEqual(
+            self.read("blog", "page", "2"),
+            "Blog (page 2)|<div><h1>Blog (page 2)</h1><ul>"
+            '<li><a href="/site/blog/a/">A</a> <time datetime="2024-01-01">2024-01-01</time></li>'
+            '<li><a href="/site/blog/c/">C</a></li>'
+            '</ul><nav><a href="/site/blog/" rel="prev">Newer posts</a></nav></div>',
+        )
+
+    def test_only_affected_pages_are_rewritten(self):
+        self.build()
+        self.assertEqual(self.build(), 0)
+        self.write_post("c", None, "Renamed")
+        self.assertEqual(self.build(), 1)
+        self.assertIn('<a href="/site/blog/c/">Renamed</a>', self.read("blog", "page", "2"))
+        with open(os.path.join(self.content, "blog", "a", "index.md"), "a") as f:
+            f.write("\n\nA new paragraph.")
+        self.assertEqual(self.build(), 0)
+
+    def test_affected_lists_listing_pages(self):
+        self.build()
+        manifest = Manifest(self.manifest_path, "/site/")
+        rebuilt, _ = manifest.affected(os.path.join(self.content, "blog", "c", "index.md"))
+        self.assertEqual(
+            rebuilt,
+            [
+                os.path.join(self.docs, "blog", "c", "index.html"),
+                os.path.join(self.docs, "blog", "page", "2", "index.html"),
+            ],
+        )
+
+    def test_section_with_index_page(self):
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog")
+        with self.assertRaises(ValueError):
+            self.build()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from manifest import Manifest
+
+
+class TestManifest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manifest_path = os.path.join(self.root, ".cache", "manifest.json")
+        self.source = os.path.join(self.root, "index.md")
+        self.dest = os.path.join(self.root, "docs", "index.html")
+        self.write(self.source, "# title")
+        self.write(self.dest, "<h1>title</h1>")
+
+    def saved_manifest(self, basepath="/"):
+        manifest = Manifest(self.manifest_path, basepath)
+        manifest.record(self.dest, [self.source])
+        manifest.save()
+        return Manifest(self.manifest_path, basepath)
+
+    def test_empty(self):
+        manifest = Manifest(self.manifest_path, "/")
+        self.assertEqual(manifest.entries, {})
+        self.assertFalse(manifest.up_to_date(self.dest, [self.source]))
+
+    def test_up_to_date(self):
+        manifest = self.saved_manifest()
+        self.assertTrue(manifest.up_to_date(self.dest, [self.source]))
+        self.assertIn(self.dest, manifest.outputs)
+
+    def test_source_changed(self):
+        manifest = self.saved_manifest()
+        self.write(self.source, "# another title")
+        self.assertFalse(manifest.up_to_date(self.dest, [self.source]))
+
+    def test_basepath_changed(self):
+        self.saved_manifest("/")
+        manifest = Manifest(self.manifest_path, "/static-site/")
+        self.assertFalse(manifest.up_to_date(self.dest, [self.source]))
+
+    def test_output_missing(self):
+        manifest = self.saved_manifest()
+        os.remove(self.dest)
+        self.assertFalse(manifest.up_to_date(self.dest, [self.source]))
+
+    def test_unchanged_build_skips_save(self):
+        manifest = self.saved_manifest()
+        self.assertTrue(manifest.up_to_date(self.dest, [self.source]))
+        os.remove(self.manifest_path)
+        manifest.save()
+        self.assertFalse(os.path.exists(self.manifest_path))
+
+        self.write(self.source, "# another title")
+        self.assertFalse(manifest.up_to_date(self.dest, [self.source]))
+        manifest.record(self.dest, [self.source])
+        manifest.save()
+        self.assertTrue(Manifest(self.manifest_path, "/").up_to_date(self.dest, [self.source]))
+
+    def test_advance(self):
+        manifest = self.saved_manifest()
+        self.write(self.source, "# another title")
+        manifest.record(self.dest, [self.source])
+        manifest.advance()
+        self.assertTrue(manifest.up_to_date(self.dest, [self.source]))
+        self.assertFalse(Manifest(self.manifest_path, "/").up_to_date(self.dest, [self.source]))
+        manifest.save()
+        self.assertTrue(Manifest(self.manifest_path, "/").up_to_date(self.dest, [self.source]))
+
+    def test_prune(self):
+        manifest = self.saved_manifest()
+        manifest.prune(os.path.join(self.root, "docs"))
+        self.assertFalse(os.path.exists(self.dest))
+        self.assertTrue(os.path.exists(os.path.join(self.root, "docs")))
+
+    def test_one_key_per_output(self):
+        dotted = os.path.join(self.root, ".", "docs", "index.html")
+        manifest = Manifest(self.manifest_path, "/")
+        manifest.record(dotted, [self.source])
+        manifest.record(self.dest, [self.source])
+        self.assertEqual(list(manifest.outputs), [self.dest])
+        manifest.save()
+        manifest = Manifest(self.manifest_path, "/")
+        self.assertTrue(manifest.up_to_date(dotted, [self.source]))
+        self.assertEqual(manifest.dependencies(self.dest), [self.source])
+
+    def test_missing_input(self):
+        image = os.path.join(self.root, "cat.png")
+        self.write(image, "png")
+        manifest = Manifest(self.manifest_path, "/")
+        manifest.record(self.dest, [self.source, image])
+        manifest.save()
+        os.remove(image)
+        manifest = Manifest(self.manifest_path, "/")
+        self.assertCountEqual(manifest.dependencies(self.dest), [self.source, image])
+        self.assertFalse(manifest.up_to_date(self.dest, [self.source, image]))
+
+    def test_affected(self):
+        manifest = Manifest(self.manifest_path, "/")
+        manifest.record(self.dest, [self.source], {"linked_pages": [os.path.join(self.root, "about.md")]})
+        manifest.save()
+        manifest = Manifest(self.manifest_path, "/")
+        self.assertEqual(manifest.affected(self.source), ([self.dest], []))
+        self.assertEqual(manifest.affected(os.path.join(self.root, "about.md")), ([], [self.dest]))
+        self.assertTrue(manifest.up_to_date(self.dest, [self.source]))
+        self.assertIn("linked_pages", manifest.outputs[self.dest])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,10 @@
+import io
 import unittest
 from markdown_blocks import (
     markdown_to_html_node,
     markdown_to_blocks,
     block_to_block_type,
+    iter_blocks,
     BlockType,
 )
 
@@ -163,6 +165,57 @@ the **same** even with inline stuff
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
 
+    def test_code_with_language(self):
+        md = """
+```Python
+print("hi")
+```
+"""
+
+        node = markdown_to_html_node(md)
+        html = node.to_html()
+        self.assertEqual(
+            html,
+            '<div><pre><code class="language-python">print("hi")\n</code></pre></div>',
+        )
+
+    def test_code_with_blank_lines(self):
+        md = """
+```
+def main():
+
+    return 1
+```
+
+after
+"""
+
+        node = markdown_to_html_node(md)
+        html = node.to_html()
+        self.assertEqual(
+            html,
+            "<div><pre><code>def main():\n\n    return 1\n</code></pre><p>after</p></div>",
+        )
+
+    def test_iter_blocks_file(self):
+        md = io.StringIO("# title\n\n```\ncode\n```\nnext paragraph\n\n- a\n- b\n")
+        self.assertEqual(
+            list(iter_blocks(md)),
+            [
+                ("# title", BlockType.HEADING),
+                ("```\ncode\n```", BlockType.CODE),
+                ("next paragraph", BlockType.PARAGRAPH),
+                ("- a\n- b", BlockType.ULIST),
+            ],
+        )
+
+    def test_iter_blocks_inline_fence(self):
+        md = "```inline``` code\n\nparagraph"
+        self.assertEqual(
+            [block for block, _ in iter_blocks(md.split("\n"))],
+            ["```inline``` code", "paragraph"],
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,74 @@
+import io
+import os
+import tempfile
+import unittest
+
+import minify
+from copystatic import copy_files_recursive
+
+
+class TestMinifyHtml(unittest.TestCase):
+    page = (
+        "<!doctype html>\n<html>\n  <head>\n    <title>T</title>\n  </head>\n"
+        "  <body><p>a   <b>b</b>\n   c</p>\n"
+        "<pre><code>x   y\n  z</code></pre> <p><code>a  b</code></p></body>\n</html>"
+    )
+    expected = (
+        "<!doctype html><html><head><title>T</title></head><body><p>a <b>b</b>\nc</p>"
+        "<pre><code>x   y\n  z</code></pre><p><code>a  b</code></p></body></html>"
+    )
+
+    def test_minify_html(self):
+        output, rest, _ = minify.minify_html(self.page, True)
+        self.assertEqual(output, self.expected)
+        self.assertEqual(rest, "")
+
+    def test_stream(self):
+        for size in (1, 5, 64):
+            buffer = io.StringIO()
+            minifier = minify.Minifier(None)
+            stream = minifier.stream(buffer)
+            for i in range(0, len(self.page), size):
+                stream.write(self.page[i : i + size])
+                stream.flush(False)
+            stream.close()
+            self.assertEqual(buffer.getvalue(), self.expected)
+            self.assertEqual(stream.saved, len(self.page) - len(self.expected))
+            self.assertEqual(minifier.saved, {"html": len(self.page) - len(self.expected)})
+
+
+class TestMinifyCss(unittest.TestCase):
+    def test_minify_css(self):
+        self.assertEqual(
+            minify.minify_css(
+                "/* comment */\na :hover ,\nb > c {\n  content: \"a  ;}\" ;\n  color : red ;\n}\n"
+            ),
+            'a :hover,b>c{content:"a  ;}";color :red}\n',
+        )
+
+    def test_copy_uses_cached_minified_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            static = os.path.join(tmp, "static")
+            docs = os.path.join(tmp, "docs")
+            os.makedirs(static)
+            with open(os.path.join(static, "index.css"), "w") as f:
+                f.write("body {\n  color: red;\n}\n")
+            with open(os.path.join(static, "robots.txt"), "w") as f:
+                f.write("User-agent:   *\n")
+            minifier = minify.Minifier(os.path.join(tmp, "cache"))
+            previous = minify.activate(minifier)
+            try:
+                copy_files_recursive(static, docs)
+            finally:
+                minify.activate(previous)
+            self.assertEqual(minifier.summary(), "7.0 B saved on css")
+
+            with open(os.path.join(docs, "index.css")) as f:
+                self.assertEqual(f.read(), "body{color:red}\n")
+            with open(os.path.join(docs, "robots.txt")) as f:
+                self.assertEqual(f.read(), "User-agent:   *\n")
+            self.assertEqual(len(os.listdir(os.path.join(tmp, "cache"))), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from gencontent import generate_pages_recursive
+from manifest import Manifest
+from pageindex import scan_page
+
+
+class TestPageIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.docs = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+
+    def test_scan_page(self):
+        path = os.path.join(self.content, "tom.md")
+        self.write(path, "---\ntags: [lotr]\n---\n\nIntro\n\n# Tom\n\n# Later")
+        self.assertEqual(scan_page(path), ("Tom", {"tags": ["lotr"]}))
+        self.write(path, "---\ntitle: Front\n---\n# Tom")
+        self.assertEqual(scan_page(path), ("Front", {"title": "Front"}))
+
+    def test_drafts_are_skipped(self):
+        self.write(os.path.join(self.content, "index.md"), "---\ndate: 2024-01-05\n---\n# Home\n\nHi")
+        self.write(
+            os.path.join(self.content, "draft.md"), "---\ndraft: true\n---\n# Draft\n\n**unclosed"
+        )
+        manifest = Manifest(os.path.join(self.root, "manifest.json"), "/")
+        page_index = generate_pages_recursive(self.content, self.template, self.docs, "/", manifest)
+
+        self.assertEqual(
+            [(page.title, page.metadata) for page in page_index.pages],
+            [("Home", {"date": "2024-01-05"})],
+        )
+        self.assertEqual([page.title for page in page_index.drafts], ["Draft"])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "draft.html")))
+        with open(os.path.join(self.docs, "index.html")) as f:
+            self.assertEqual(f.read(), "<title>Home</title><div><h1>Home</h1><p>Hi</p></div>")
+
+    def test_update(self):
+        index_path = os.path.join(self.content, "index.md")
+        draft_path = os.path.join(self.content, "draft.md")
+        self.write(index_path, "# Home")
+        self.write(draft_path, "---\ndraft: true\n---\n# Draft")
+        page_index = generate_pages_recursive(self.content, self.template, self.docs, "/")
+
+        self.write(index_path, "---\ndate: 2024-01-05\n---\n# Welcome")
+        page = page_index.update(index_path)
+        self.assertEqual((page.title, page.metadata), ("Welcome", {"date": "2024-01-05"}))
+        self.assertEqual(page_index.pages, [page])
+
+        self.write(draft_path, "# Draft")
+        self.assertIsNone(page_index.update(draft_path))
+        self.assertIsNone(page_index.update(os.path.join(self.content, "new.md")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import time
+import unittest
+
+import parsecache
+from fixtures import TempDirTestCase
+from gencontent import generate_pages_recursive
+from parsecache import ParseCache
+
+
+class TestParseCache(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = ParseCache(os.path.join(self.root, "pages"))
+        self.content = os.path.join(self.root, "content")
+        self.docs = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, '<title>{{ Title }}</title><a href="/">home</a>{{ Content }}')
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[post](/blog/post)")
+        self.previous = parsecache.activate(self.cache)
+
+    def tearDown(self):
+        parsecache.activate(self.previous)
+
+    def read(self, *parts):
+        return super().read(os.path.join(self.docs, *parts))
+
+    def entries(self):
+        return [
+            filename
+            for _, _, filenames in os.walk(self.cache.dir_path)
+            for filename in filenames
+        ]
+
+    def test_key(self):
+        path = os.path.join(self.content, "index.md")
+        key = self.cache.key(path)
+        self.assertEqual(key, self.cache.key(path))
+        self.write(path, "# Changed")
+        self.assertNotEqual(key, self.cache.key(path))
+
+    def test_key_skips_marker(self):
+        path = os.path.join(self.content, "index.md")
+        self.write(path, "# Home\n\nnul \0 byte")
+        self.assertIsNone(self.cache.key(path))
+
+    def test_basepath_change_reuses_entry(self):
+        generate_pages_recursive(self.content, self.template, self.docs, "/")
+        self.assertEqual(
+            self.read("index.html"),
+            '<title>Home</title><a href="/">home</a>'
+            '<div><h1>Home</h1><p><a href="/blog/post">post</a></p></div>',
+        )
+        entry_path = self.cache.entry_path(self.cache.key(os.path.join(self.content, "index.md")))
+        with open(entry_path, "w") as f:
+            f.write("Cached\n<div>from \0cache</div>")
+        generate_pages_recursive(self.content, self.template, self.docs, "/site/")
+        self.assertEqual(
+            self.read("index.html"),
+            '<title>Cached</title><a href="/site/">home</a><div>from /site/cache</div>',
+        )
+        self.assertEqual(len(self.entries()), 1)
+
+    def test_parallel_matches_uncached(self):
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog\n\n![img](/a.png)")
+        generate_pages_recursive(self.content, self.template, self.docs, "/site/", jobs=2)
+        cached = self.read("blog", "index.html")
+        parsecache.activate(None)
+        generate_pages_recursive(self.content, self.template, self.docs, "/site/")
+        self.assertEqual(cached, self.read("blog", "index.html"))
+        self.assertEqual(len(self.entries()), 2)
+
+    def test_prune(self):
+        generate_pages_recursive(self.content, self.template, self.docs, "/")
+        self.assertEqual(self.cache.prune(30), 0)
+        for dir_path, _, filenames in os.walk(self.cache.dir_path):
+            for filename in filenames:
+                old = time.time() - 31 * 86400
+                os.utime(os.path.join(dir_path, filename), (old, old))
+        self.assertEqual(self.cache.prune(30), 1)
+        self.assertEqual(self.entries(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import gzip
+import os
+import unittest
+
+import precompress
+from fixtures import TempDirTestCase
+from gencontent import generate_pages_recursive
+from precompress import Precompressor, precompress_outputs
+
+
+class TestPrecompress(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+
+    def read_gzip(self, path):
+        with gzip.open(path, "rt") as f:
+            return f.read()
+
+    def test_wants(self):
+        precompressor = Precompressor(min_size=10)
+        self.assertTrue(precompressor.wants("docs/index.html", 10))
+        self.assertFalse(precompressor.wants("docs/index.html", 9))
+        self.assertFalse(precompressor.wants("docs/image.png", 100))
+
+    def test_write(self):
+        path = os.path.join(self.root, "index.css")
+        precompressor = Precompressor(min_size=4)
+        self.assertTrue(precompressor.write(path, b"body {}"))
+        self.assertEqual(self.read_gzip(path + ".gz"), "body {}")
+        self.assertFalse(precompressor.write(path, b"a"))
+
+    @unittest.skipIf(precompress.brotli is not None, "brotli is installed")
+    def test_brotli_missing(self):
+        with self.assertRaises(ValueError):
+            Precompressor(("gzip", "brotli"))
+
+    def test_precompress_outputs(self):
+        page = os.path.join(self.root, "index.html")
+        image = os.path.join(self.root, "cat.png")
+        self.write(page, "<p>hello</p>")
+        self.write(image, "png data")
+        precompressor = Precompressor(min_size=0)
+        siblings = precompress_outputs(precompressor, [page, image])
+        self.assertEqual(siblings, [page + ".gz"])
+        self.assertTrue(precompressor.is_fresh(page))
+
+        stat = os.stat(page)
+        os.utime(page, ns=(stat.st_atime_ns, os.stat(page + ".gz").st_mtime_ns + 1))
+        self.assertFalse(precompressor.is_fresh(page))
+        precompress_outputs(precompressor, [page])
+        self.assertTrue(precompressor.is_fresh(page))
+
+    def test_pages_precompressed_on_write(self):
+        content = os.path.join(self.root, "content")
+        docs = os.path.join(self.root, "docs")
+        template = os.path.join(self.root, "template.html")
+        self.write(template, "{{ Title }}{{ Content }}")
+        self.write(os.path.join(content, "index.md"), "# Home")
+        previous = precompress.activate(Precompressor(min_size=0))
+        try:
+            generate_pages_recursive(content, template, docs, "/")
+        finally:
+            precompress.activate(previous)
+        self.assertEqual(
+            self.read_gzip(os.path.join(docs, "index.html.gz")), "Home<div><h1>Home</h1></div>"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+
+import rendercache
+from gencontent import render_blocks
+from markdown_blocks import BlockType, iter_blocks
+from rendercache import RenderCache
+
+
+class TestRenderCache(unittest.TestCase):
+    def test_get_put(self):
+        cache = RenderCache()
+        key = cache.key("hello", BlockType.PARAGRAPH, "/")
+        self.assertIsNone(cache.get(key))
+        cache.put(key, "<p>hello</p>")
+        self.assertEqual(cache.get(key), "<p>hello</p>")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_key(self):
+        key = RenderCache.key("hello", BlockType.PARAGRAPH, "/")
+        self.assertNotEqual(key, RenderCache.key("hello", BlockType.PARAGRAPH, "/site/"))
+        self.assertNotEqual(key, RenderCache.key("hello", BlockType.CODE, "/"))
+
+    def test_lru_eviction(self):
+        cache = RenderCache(max_entries=2)
+        cache.put("a", "A")
+        cache.put("b", "B")
+        cache.get("a")
+        cache.put("c", "C")
+        self.assertEqual(list(cache.entries), ["a", "c"])
+
+    def test_drain_merge(self):
+        worker = RenderCache()
+        worker.put("a", "A")
+        worker.get("a")
+        parent = RenderCache()
+        parent.merge(worker.drain())
+        self.assertEqual(parent.entries["a"], "A")
+        self.assertEqual((parent.hits, parent.misses), (1, 0))
+        self.assertEqual(worker.drain(), {"entries": {}, "hits": 0, "misses": 0})
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache", "render-cache.json")
+            cache = RenderCache()
+            cache.put("a", "A")
+            cache.save(path)
+            loaded = RenderCache()
+            loaded.load(path)
+            self.assertEqual(dict(loaded.entries), {"a": "A"})
+
+    def test_render_blocks_cached(self):
+        md = "[home](/index.html)\n\n[home](/index.html)"
+        uncached = "".join(node.to_html() for node in render_blocks(iter_blocks(md.split("\n")), "/site/"))
+        previous = rendercache.activate(RenderCache())
+        try:
+            cached = "".join(
+                node.to_html() for node in render_blocks(iter_blocks(md.split("\n")), "/site/")
+            )
+            self.assertEqual(rendercache.active.hits, 1)
+        finally:
+            rendercache.activate(previous)
+        self.assertEqual(cached, uncached)
+        self.assertEqual(cached, '<p><a href="/site/index.html">home</a></p>' * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+import json
+import os
+import tempfile
+import unittest
+
+import search
+from gencontent import generate_pages_recursive
+from manifest import Manifest
+from markdown_blocks import block_to_html_node, iter_blocks
+
+
+class TestPageTerms(unittest.TestCase):
+    def test_page_terms(self):
+        terms = search.page_terms(
+            [
+                "# Tolkien Glossary",
+                "",
+                "The **Tolkien** fan [club](/club) and ![a hobbit](/hobbit.png)",
+                "",
+                "- elves",
+                "- dwarves",
+                "",
+                "```",
+                "not_indexed = True",
+                "```",
+            ]
+        )
+        self.assertEqual(terms["tolkien"], 9)
+        self.assertEqual(terms["glossary"], 8)
+        self.assertEqual(terms["club"], 1)
+        self.assertEqual(terms["hobbit"], 1)
+        self.assertEqual(terms["elves"], 1)
+        self.assertNotIn("the", terms)
+        self.assertNotIn("not_indexed", terms)
+
+
+    def test_node_terms_match_page_terms(self):
+        lines = [
+            "## Rivendell *Council*",
+            "",
+            "> Elrond said `ring` and [more](/more)",
+            "",
+            "1. one ring",
+            "2. nine riders",
+            "",
+            "```py",
+            "skipped = 1",
+            "```",
+        ]
+        terms = {}
+        for block, block_type in iter_blocks(lines):
+            search.add_node_terms(terms, block_to_html_node(block, block_type))
+        self.assertEqual(terms, search.page_terms(lines))
+
+
+class TestSearchIndex(unittest.TestCase):
+    def test_shards(self):
+        index = search.SearchIndex()
+        index.add("/b.html", "B", {"elves": 2, "elrond": 1})
+        index.add("/a.html", "A", {"elves": 1, "dwarves": 3})
+        docs, shards = index.shards()
+        self.assertEqual(docs, [["/a.html", "A"], ["/b.html", "B"]])
+        self.assertEqual(
+            shards,
+            {
+                "el": {"elves": [[0, 1], [1, 2]], "elrond": [[1, 1]]},
+                "dw": {"dwarves": [[0, 3]]},
+            },
+        )
+
+    def test_write_skips_unchanged_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            dir_path = os.path.join(tmp, "search")
+            index = search.SearchIndex()
+            index.add("/a.html", "A", {"elves": 1, "dwarves": 3})
+            paths = index.write(dir_path)
+            self.assertEqual(
+                [os.path.basename(path) for path in paths], ["dw.json", "el.json", "index.json"]
+            )
+            with open(os.path.join(dir_path, "el.json")) as f:
+                self.assertEqual(json.load(f), {"elves": [[0, 1]]})
+
+            mtime = os.stat(os.path.join(dir_path, "dw.json")).st_mtime_ns
+            os.utime(os.path.join(dir_path, "dw.json"), ns=(mtime - 10**9, mtime - 10**9))
+            index.add("/a.html", "A", {"elves": 2, "dwarves": 3})
+            index.write(dir_path)
+            self.assertEqual(os.stat(os.path.join(dir_path, "dw.json")).st_mtime_ns, mtime - 10**9)
+            with open(os.path.join(dir_path, "el.json")) as f:
+                self.assertEqual(json.load(f), {"elves": [[0, 2]]})
+
+    def test_patched_shards_match_a_fresh_index(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            patched = search.SearchIndex()
+            patched.add("/a.html", "A", {"elves": 1, "dwarves": 3})
+            patched.add("/b.html", "B", {"elves": 2, "ents": 1})
+            patched.write(os.path.join(tmp, "patched"))
+            patched.add("/a.html", "Aa", {"elves": 4, "orcs": 1})
+            paths = patched.write(os.path.join(tmp, "patched"))
+
+            fresh = search.SearchIndex()
+            fresh.add("/a.html", "Aa", {"elves": 4, "orcs": 1})
+            fresh.add("/b.html", "B", {"elves": 2, "ents": 1})
+            fresh_paths = fresh.write(os.path.join(tmp, "fresh"))
+
+            self.assertEqual(
+                [os.path.basename(path) for path in paths],
+                [os.path.basename(path) for path in fresh_paths],
+            )
+            for path, fresh_path in zip(paths, fresh_paths):
+                with open(path) as f, open(fresh_path) as fresh_file:
+                    self.assertEqual(f.read(), fresh_file.read())
+
+
+class TestIncrementalIndex(unittest.TestCase):
+    def test_unchanged_pages_keep_their_terms(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            docs = os.path.join(tmp, "docs")
+            template = os.path.join(tmp, "template.html")
+            manifest_path = os.path.join(tmp, "manifest.json")
+            os.makedirs(os.path.join(content, "blog"))
+            for path, text in (
+                (template, "{{ Title }}{{ Content }}"),
+                (os.path.join(content, "index.md"), "# Home\n\nWelcome elves"),
+                (os.path.join(content, "blog", "tom.md"), "# Tom\n\nBombadil"),
+            ):
+                with open(path, "w") as f:
+                    f.write(text)
+
+            previous = search.activate(search.SearchIndex())
+            try:
+                manifest = Manifest(manifest_path, "/site/")
+                generate_pages_recursive(content, template, docs, "/site/", manifest)
+                manifest.save()
+                with open(os.path.join(content, "index.md"), "w") as f:
+                    f.write("# Home\n\nWelcome dwarves")
+                manifest = Manifest(manifest_path, "/site/")
+                generate_pages_recursive(content, template, docs, "/site/", manifest)
+            finally:
+                search.activate(previous)
+
+            index = search.SearchIndex()
+            index.add_outputs(manifest.outputs, docs, "/site/")
+            self.assertEqual(
+                index.pages,
+                {
+                    "/site/index.html": ("Home", {"home": 8, "welcome": 1, "dwarves": 1}),
+                    "/site/blog/tom.html": ("Tom", {"tom": 8, "bombadil": 1}),
+                },
+            )
+
+    def test_template_change_reuses_terms(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            docs = os.path.join(tmp, "docs")
+            template = os.path.join(tmp, "template.html")
+            manifest_path = os.path.join(tmp, "manifest.json")
+            os.makedirs(content)
+            for path, text in (
+                (template, "{{ Title }}{{ Content }}"),
+                (os.path.join(content, "index.md"), "# Home\n\nWelcome elves"),
+            ):
+                with open(path, "w") as f:
+                    f.write(text)
+
+            def fail(*args):
+                raise AssertionError("terms collected again")
+
+            previous = search.activate(search.SearchIndex())
+            try:
+                manifest = Manifest(manifest_path, "/")
+                generate_pages_recursive(content, template, docs, "/", manifest)
+                manifest.save()
+                with open(template, "w") as f:
+                    f.write("<main>{{ Content }}</main>")
+                manifest = Manifest(manifest_path, "/")
+                collectors = search.add_node_terms, search.page_terms
+                search.add_node_terms = search.page_terms = fail
+                try:
+                    generate_pages_recursive(content, template, docs, "/", manifest)
+                finally:
+                    search.add_node_terms, search.page_terms = collectors
+            finally:
+                search.activate(previous)
+
+            record = manifest.outputs[os.path.join(docs, "index.html")]["search"]
+            self.assertEqual(record, ["Home", {"home": 8, "welcome": 1, "elves": 1}])
+
+
+if __name__ == "__main__":
+    unittest.main()
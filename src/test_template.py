@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+
+from gencontent import rewrite_root_urls
+from htmlnode import LeafNode, ParentNode
+from template import Template, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_parse(self):
+        template = Template("<title>{{ Title }}</title><article>{{ Content }}</article>")
+        self.assertEqual(template.literals, ["<title>", "</title><article>", "</article>"])
+        self.assertEqual(template.slots, ["Title", "Content"])
+
+    def test_render(self):
+        template = Template('<link href="/index.css" /><title>{{ Title }}</title>{{ Content }}')
+        self.assertEqual(
+            template.render({"Title": "Home", "Content": '<a href="/blog">blog</a>'}, "/site/"),
+            '<link href="/site/index.css" /><title>Home</title><a href="/blog">blog</a>',
+        )
+
+    def test_render_protocol_relative(self):
+        template = Template('<script src="//cdn.example.com/a.js"></script>')
+        self.assertEqual(
+            template.render({}, "/site/"),
+            '<script src="//cdn.example.com/a.js"></script>',
+        )
+
+    def test_render_missing_slot(self):
+        template = Template("{{ Title }}")
+        with self.assertRaises(ValueError):
+            template.render({}, "/")
+
+    def test_load_template_cached(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write("{{ Title }}")
+            self.assertIs(load_template(path), load_template(path))
+
+
+class TestRewriteRootURLs(unittest.TestCase):
+    def test_rewrite(self):
+        node = ParentNode(
+            "p",
+            [
+                LeafNode("a", "blog", {"href": "/blog"}),
+                LeafNode("img", "", {"src": "/images/tom.png", "alt": "tom"}),
+                LeafNode("a", "boot.dev", {"href": "https://boot.dev"}),
+                LeafNode(None, 'literal href="/blog" text'),
+            ],
+        )
+        rewrite_root_urls(node, "/site/")
+        self.assertEqual(
+            node.to_html(),
+            '<p><a href="/site/blog">blog</a><img src="/site/images/tom.png" alt="tom"></img>'
+            '<a href="https://boot.dev">boot.dev</a>literal href="/blog" text</p>',
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,6 +12,8 @@ class TextType(Enum):
 
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -29,16 +31,20 @@ class TextNode:
 
 
 def text_node_to_html_node(text_node):
-    if text_node.text_type == TextType.TEXT:
-        return LeafNode(None, text_node.text)
-    if text_node.text_type == TextType.BOLD:
-        return LeafNode("b", text_node.text)
-    if text_node.text_type == TextType.ITALIC:
-        return LeafNode("i", text_node.text)
-    if text_node.text_type == TextType.CODE:
-        return LeafNode("code", text_node.text)
-    if text_node.text_type == TextType.LINK:
-        return LeafNode("a", text_node.text, {"href": text_node.url})
-    if text_node.text_type == TextType.IMAGE:
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
-    raise ValueError(f"invalid text type: {text_node.text_type}")
+    return text_to_html_node(text_node.text, text_node.text_type, text_node.url)
+
+
+def text_to_html_node(text, text_type, url=None):
+    if text_type == TextType.TEXT:
+        return LeafNode(None, text)
+    if text_type == TextType.BOLD:
+        return LeafNode("b", text)
+    if text_type == TextType.ITALIC:
+        return LeafNode("i", text)
+    if text_type == TextType.CODE:
+        return LeafNode("code", text)
+    if text_type == TextType.LINK:
+        return LeafNode("a", text, {"href": url})
+    if text_type == TextType.IMAGE:
+        return LeafNode("img", "", {"src": url, "alt": text})
+    raise ValueError(f"invalid text type: {text_type}")